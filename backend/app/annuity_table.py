@@ -0,0 +1,154 @@
+"""
+Precomputed annuity denominators for standard terms and APR ticks.
+
+Most scenarios use terms of 12 to 480 months in steps of 12 and APRs quoted in
+1/8 or 1/100 of a percent; both are multiples of 1/200 %. This table holds
+``calc.annuity_denominator`` for every such (APR tick, term) pair up to
+ANNUITY_TABLE_MAX_APR, computed with the live Decimal path, so a payment priced
+from the table rounds exactly like one priced live. ``calc.annuity_denominator``
+consults the installed table first and falls back to exponentiation for any
+other APR or term.
+
+Each denominator is stored exactly as a 16-byte record (96-bit coefficient and
+16-bit exponent) in one flat buffer: 40 terms x 200 ticks per percent is 128 KB
+per percent of APR range, 3.8 MB for the default 30%. The buffer is either
+built in memory at startup (about 10 us per entry: roughly 2.3 s for the
+240,000 entries up to 30% on a current x86 core) or memory-mapped from a file
+written by
+
+    python -m app.annuity_table annuity.bin --max-apr 30
+
+which loads in well under a millisecond and shares its pages between workers.
+ANNUITY_TABLE selects the mode: "off" (default), "build", or the file path.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from decimal import Decimal, getcontext
+from typing import Optional
+
+from app.calc import live_annuity_denominator, set_annuity_table
+
+ANNUITY_TABLE = os.getenv("ANNUITY_TABLE", "off")
+ANNUITY_TABLE_MAX_APR = Decimal(os.getenv("ANNUITY_TABLE_MAX_APR", "30"))
+
+TICKS_PER_PERCENT = 200
+TERM_STEP = 12
+MAX_TERM = 480
+TERM_COUNT = MAX_TERM // TERM_STEP
+
+MAGIC = b"ANNUITY1"
+# magic, ticks per percent, max tick, term step, max term, precision
+HEADER = struct.Struct("<8s5I")
+HEADER_SIZE = 32
+RECORD_SIZE = 16
+COEFFICIENT_BYTES = 12
+EXPONENT = struct.Struct("<h")
+
+
+class AnnuityTable:
+    """
+    Denominators for APR ticks 1..max_tick (tick / 200 %) and terms 12..480 in
+    steps of 12, read from a buffer of fixed-size records.
+    """
+
+    def __init__(self, buffer, max_tick: int, offset: int = 0):
+        if len(buffer) < offset + max_tick * TERM_COUNT * RECORD_SIZE:
+            raise ValueError("annuity table buffer is too small")
+        self._buffer = buffer
+        self._offset = offset
+        self.max_tick = max_tick
+
+    @classmethod
+    def build(cls, max_apr: Decimal = ANNUITY_TABLE_MAX_APR) -> "AnnuityTable":
+        if getcontext().prec > 28:
+            raise ValueError("annuity table records hold at most 28 significant digits")
+        max_tick = int(max_apr * TICKS_PER_PERCENT)
+        if max_tick < 1 or max_tick > 100 * TICKS_PER_PERCENT:
+            raise ValueError("max_apr must be between 0.005 and 100")
+        buffer = bytearray(max_tick * TERM_COUNT * RECORD_SIZE)
+        position = 0
+        for tick in range(1, max_tick + 1):
+            apr = Decimal(tick) / TICKS_PER_PERCENT
+            for term in range(TERM_STEP, MAX_TERM + 1, TERM_STEP):
+                _, digits, exponent = live_annuity_denominator(apr, term).as_tuple()
+                coefficient = int("".join(map(str, digits)))
+                buffer[position:position + COEFFICIENT_BYTES] = coefficient.to_bytes(COEFFICIENT_BYTES, "little")
+                EXPONENT.pack_into(buffer, position + COEFFICIENT_BYTES, exponent)
+                position += RECORD_SIZE
+        return cls(buffer, max_tick)
+
+    @classmethod
+    def load(cls, path: str) -> "AnnuityTable":
+        """
+        Memory-map a table written by save(). The header must match this
+        module's layout and the current Decimal precision.
+        """
+        with open(path, "rb") as fp:
+            buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, ticks, max_tick, term_step, max_term, prec = HEADER.unpack_from(buffer)
+        if magic != MAGIC or (ticks, term_step, max_term) != (TICKS_PER_PERCENT, TERM_STEP, MAX_TERM):
+            raise ValueError(f"{path} is not a compatible annuity table")
+        if prec != getcontext().prec:
+            raise ValueError(f"{path} was built with precision {prec}, not {getcontext().prec}")
+        return cls(buffer, max_tick, offset=HEADER_SIZE)
+
+    def save(self, path: str) -> None:
+        header = HEADER.pack(MAGIC, TICKS_PER_PERCENT, self.max_tick, TERM_STEP, MAX_TERM, getcontext().prec)
+        with open(path, "wb") as fp:
+            fp.write(header.ljust(HEADER_SIZE, b"\0"))
+            fp.write(self._buffer[self._offset:self._offset + self.nbytes])
+
+    @property
+    def nbytes(self) -> int:
+        return self.max_tick * TERM_COUNT * RECORD_SIZE
+
+    def __len__(self) -> int:
+        return self.max_tick * TERM_COUNT
+
+    def lookup(self, apr_percent: Decimal, term_months: int) -> Optional[Decimal]:
+        """
+        The stored denominator, or None when the APR or term is not in the table.
+        """
+        if term_months % TERM_STEP or not TERM_STEP <= term_months <= MAX_TERM:
+            return None
+        tick = apr_percent * TICKS_PER_PERCENT
+        if tick != tick.to_integral_value():
+            return None
+        tick = int(tick)
+        if not 1 <= tick <= self.max_tick:
+            return None
+        position = self._offset + ((tick - 1) * TERM_COUNT + term_months // TERM_STEP - 1) * RECORD_SIZE
+        coefficient = int.from_bytes(self._buffer[position:position + COEFFICIENT_BYTES], "little")
+        return Decimal(coefficient).scaleb(EXPONENT.unpack_from(self._buffer, position + COEFFICIENT_BYTES)[0])
+
+
+def configure_annuity_table(setting: str = ANNUITY_TABLE) -> Optional[AnnuityTable]:
+    """
+    Build or load the table selected by ANNUITY_TABLE and install it in calc.
+    """
+    if setting.strip().lower() in ("", "off", "false", "0"):
+        table = None
+    elif setting.strip().lower() == "build":
+        table = AnnuityTable.build()
+    else:
+        table = AnnuityTable.load(setting)
+    set_annuity_table(table)
+    return table
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Write an annuity table file for ANNUITY_TABLE.")
+    parser.add_argument("output")
+    parser.add_argument("--max-apr", type=Decimal, default=ANNUITY_TABLE_MAX_APR, help="highest APR in percent (default: %(default)s)")
+    args = parser.parse_args(argv)
+    table = AnnuityTable.build(args.max_apr)
+    table.save(args.output)
+    print(f"wrote {len(table)} denominators ({table.nbytes} bytes) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
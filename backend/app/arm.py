@@ -0,0 +1,213 @@
+"""
+Adjustable-rate (ARM) schedules.
+
+The loan pays the initial APR for `fixed_months`, then the rate resets every
+`reset_interval` months to the index value for that reset plus the margin,
+limited by the caps: the first reset may move at most `initial_cap` from the
+initial APR, later resets at most `periodic_cap` from the previous rate, the
+rate never exceeds the initial APR plus `lifetime_cap` and never falls below
+`floor`. At every reset the payment is re-amortized from the remaining balance
+over the remaining term. Months are stepped with the same rounding rules as
+calc.amortization_preview: interest and principal are rounded to cents
+(ROUND_HALF_UP) every month and the balance is carried forward.
+
+An index path holds one index value per reset; a short path repeats its last
+value. Everything up to a reset depends only on the rates before it, so
+ArmEngine keeps the state at each reset boundary in a tree keyed by the
+sequence of capped rates. Paths sharing a prefix (the fixed period, a common first few resets)
+step those months once, and each new path only steps the months after the
+point where it leaves every earlier path.
+"""
+from decimal import Decimal
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from app.calc import monthly_payment, monthly_rate, round_cents
+
+ZERO = Decimal('0.00')
+MAX_APR = Decimal('100')
+
+
+class ArmTerms(NamedTuple):
+    initial_apr: Decimal
+    fixed_months: int
+    margin: Decimal
+    reset_interval: int = 12
+    # None leaves that limit off
+    initial_cap: Optional[Decimal] = None
+    periodic_cap: Optional[Decimal] = None
+    lifetime_cap: Optional[Decimal] = None
+    floor: Decimal = Decimal('0')
+
+    def next_rate(self, previous: Decimal, index: Decimal, first: bool) -> Decimal:
+        """
+        Rate after a reset from the previous rate and the index value.
+        """
+        rate = index + self.margin
+        cap = self.initial_cap if first else self.periodic_cap
+        if cap is not None:
+            rate = min(max(rate, previous - cap), previous + cap)
+        if self.lifetime_cap is not None:
+            rate = min(rate, self.initial_apr + self.lifetime_cap)
+        return min(max(rate, self.floor, Decimal('0')), MAX_APR)
+
+
+class ArmRow(NamedTuple):
+    month: int
+    apr: Decimal
+    payment: Decimal
+    interest_paid: Decimal
+    principal_paid: Decimal
+    remaining_balance: Decimal
+
+
+class ArmResult(NamedTuple):
+    initial_payment: Decimal
+    # rate and payment in force after each reset reached before payoff
+    rates: List[Decimal]
+    payments: List[Decimal]
+    max_payment: Decimal
+    total_interest: Decimal
+    payoff_month: int
+
+
+def check_terms(term_months: int, terms: ArmTerms) -> None:
+    if terms.fixed_months < 1 or terms.fixed_months > term_months:
+        raise ValueError("fixed_months must be between 1 and term_months")
+    if terms.reset_interval < 1:
+        raise ValueError("reset_interval must be >= 1")
+    if any(cap is not None and cap < 0 for cap in (terms.initial_cap, terms.periodic_cap, terms.lifetime_cap)):
+        raise ValueError("caps must be >= 0")
+
+
+def reset_count(term_months: int, terms: ArmTerms) -> int:
+    """
+    Number of resets before the end of the term.
+    """
+    return -(-(term_months - terms.fixed_months) // terms.reset_interval)
+
+
+def _index_at(index_path: Sequence[Decimal], reset: int) -> Decimal:
+    if not index_path:
+        raise ValueError("index path must not be empty")
+    return index_path[min(reset, len(index_path) - 1)]
+
+
+def _step(balance: Decimal, apr: Decimal, payment: Decimal, month: int, term_months: int) -> ArmRow:
+    interest = ZERO if apr == 0 else round_cents(balance * monthly_rate(apr))
+    principal = round_cents(payment - interest)
+    if principal >= balance or month == term_months:
+        principal = balance
+    balance -= principal
+    return ArmRow(month, apr, interest + principal, interest, principal, balance)
+
+
+def iter_arm_schedule(
+    amount: Decimal,
+    term_months: int,
+    terms: ArmTerms,
+    index_path: Sequence[Decimal],
+) -> Iterator[ArmRow]:
+    """
+    Yield one row per month of a single path until the loan is paid off.
+    """
+    check_terms(term_months, terms)
+    balance = round_cents(amount)
+    apr = terms.initial_apr
+    payment = monthly_payment(amount, apr, term_months)
+    reset = 0
+    for month in range(1, term_months + 1):
+        if month > terms.fixed_months and (month - terms.fixed_months - 1) % terms.reset_interval == 0:
+            apr = terms.next_rate(apr, _index_at(index_path, reset), reset == 0)
+            payment = monthly_payment(balance, apr, term_months - month + 1)
+            reset += 1
+        row = _step(balance, apr, payment, month, term_months)
+        balance = row.remaining_balance
+        yield row
+        if balance == 0:
+            return
+
+
+class _Boundary:
+    """
+    State after the months of one rate segment, and the segments that follow it.
+    """
+
+    __slots__ = ("apr", "payment", "balance", "interest", "month", "children")
+
+    def __init__(self, apr: Decimal, payment: Decimal, balance: Decimal, interest: Decimal, month: int):
+        self.apr = apr
+        self.payment = payment
+        self.balance = balance
+        # cumulative interest up to this boundary
+        self.interest = interest
+        # last month stepped; the payoff month once the balance is 0
+        self.month = month
+        self.children: Dict[Decimal, "_Boundary"] = {}
+
+
+class ArmEngine:
+    """
+    Evaluates many index paths for one loan, sharing the months of common path
+    prefixes. `months_stepped` counts the months actually stepped.
+    """
+
+    def __init__(self, amount: Decimal, term_months: int, terms: ArmTerms):
+        check_terms(term_months, terms)
+        self.term_months = term_months
+        self.terms = terms
+        self.resets = reset_count(term_months, terms)
+        self.months_stepped = 0
+        self.boundaries = 1
+        payment = monthly_payment(amount, terms.initial_apr, term_months)
+        start = _Boundary(terms.initial_apr, payment, round_cents(amount), ZERO, 0)
+        self._root = self._segment(start, terms.initial_apr, payment, terms.fixed_months)
+
+    def _segment(self, previous: _Boundary, apr: Decimal, payment: Decimal, end_month: int) -> _Boundary:
+        balance, interest, month = previous.balance, previous.interest, previous.month
+        while month < end_month and balance > 0:
+            month += 1
+            row = _step(balance, apr, payment, month, self.term_months)
+            balance = row.remaining_balance
+            interest += row.interest_paid
+            self.months_stepped += 1
+        return _Boundary(apr, payment, balance, interest, month)
+
+    def run(self, index_path: Sequence[Decimal]) -> ArmResult:
+        node = self._root
+        rates, payments = [], []
+        for reset in range(self.resets):
+            if node.balance == 0:
+                break
+            # keyed by the capped rate, so index values that clamp alike share a branch
+            apr = self.terms.next_rate(node.apr, _index_at(index_path, reset), reset == 0)
+            child = node.children.get(apr)
+            if child is None:
+                payment = monthly_payment(node.balance, apr, self.term_months - node.month)
+                end = min(node.month + self.terms.reset_interval, self.term_months)
+                child = node.children[apr] = self._segment(node, apr, payment, end)
+                self.boundaries += 1
+            node = child
+            rates.append(node.apr)
+            payments.append(node.payment)
+        initial = self._root.payment
+        return ArmResult(
+            initial_payment=initial,
+            rates=rates,
+            payments=payments,
+            max_payment=max([initial, *payments]),
+            total_interest=node.interest,
+            payoff_month=node.month,
+        )
+
+
+def evaluate_paths(
+    amount: Decimal,
+    term_months: int,
+    terms: ArmTerms,
+    index_paths: Sequence[Sequence[Decimal]],
+) -> List[ArmResult]:
+    """
+    Results for every path, in order, from one shared engine.
+    """
+    engine = ArmEngine(amount, term_months, terms)
+    return [engine.run(path) for path in index_paths]
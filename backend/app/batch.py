@@ -0,0 +1,136 @@
+"""
+Batched monthly payment pricing.
+
+Prices arrays of (amount, apr, term_months) in one pass. When NumPy is
+available the annuity formula is evaluated vectorized in float64 and every
+result is checked against the half-cent rounding boundary; anything too close
+to call is re-priced with the exact Decimal path, so the output always equals
+``app.calc.monthly_payment`` cent for cent.
+
+Also solves batches of scenarios for amount, APR or term given a target payment.
+"""
+from decimal import Decimal
+from typing import List, Optional, Sequence, Union
+
+from app.calc import implied_apr, max_principal, monthly_payment, payoff_term
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional speedup
+    np = None
+
+# float64 results are trusted only when they sit further than this (relative)
+# distance from a half-cent boundary; the annuity formula itself is accurate
+# to ~1e-15, so this leaves a wide safety margin
+HALF_CENT_GUARD = 1e-9
+
+
+def _validate(amounts: Sequence[Decimal], aprs: Sequence[Decimal], term_months: Sequence[int]) -> None:
+    if not (len(amounts) == len(aprs) == len(term_months)):
+        raise ValueError("amounts, aprs and term_months must have the same length")
+    for amount, apr, term in zip(amounts, aprs, term_months):
+        if term <= 0:
+            raise ValueError("term_months must be > 0")
+        if amount <= 0:
+            raise ValueError("amount must be > 0")
+        if apr < 0 or apr > 100:
+            raise ValueError("apr must be between 0 and 100")
+
+
+def monthly_payments_exact(amounts: Sequence[Decimal], aprs: Sequence[Decimal], term_months: Sequence[int]) -> List[Decimal]:
+    """
+    Price every scenario with the scalar Decimal implementation.
+    """
+    _validate(amounts, aprs, term_months)
+    return [monthly_payment(a, r, n) for a, r, n in zip(amounts, aprs, term_months)]
+
+
+def monthly_payments(amounts: Sequence[Decimal], aprs: Sequence[Decimal], term_months: Sequence[int], exact: bool = False) -> List[Decimal]:
+    """
+    Price many scenarios at once and return Decimals rounded to cents (ROUND_HALF_UP).
+    Results are identical to calling monthly_payment for each scenario.
+    Falls back to the exact Decimal path when NumPy is not installed or exact=True.
+    """
+    if exact or np is None:
+        return monthly_payments_exact(amounts, aprs, term_months)
+    _validate(amounts, aprs, term_months)
+    if not amounts:
+        return []
+
+    P = np.array([float(a) for a in amounts], dtype=np.float64)
+    apr = np.array([float(r) for r in aprs], dtype=np.float64)
+    n = np.array(term_months, dtype=np.float64)
+
+    r = apr / 100.0 / 12.0
+    zero_rate = apr == 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 1 - (1 + r) ** -n, written to stay accurate for tiny r
+        denom = -np.expm1(-n * np.log1p(r))
+        M = np.where(zero_rate, P / n, P * r / denom)
+
+    cents_raw = M * 100.0
+    frac = cents_raw - np.floor(cents_raw)
+    ambiguous = np.abs(frac - 0.5) <= HALF_CENT_GUARD * np.maximum(cents_raw, 1.0)
+    ambiguous |= ~np.isfinite(cents_raw)
+    cents = np.floor(cents_raw + 0.5)
+
+    results: List[Decimal] = []
+    for i, c in enumerate(cents.tolist()):
+        if ambiguous[i]:
+            results.append(monthly_payment(amounts[i], aprs[i], term_months[i]))
+        else:
+            results.append(Decimal(int(c)).scaleb(-2))
+    return results
+
+
+SOLVE_TARGETS = ("amount", "apr", "term_months")
+
+Solution = Union[Decimal, int, ValueError]
+
+
+def solve_scenario(
+    solve_for: str,
+    amount: Optional[Decimal],
+    apr: Optional[Decimal],
+    term_months: Optional[int],
+    payment: Decimal,
+    max_term_months: Optional[int] = None,
+) -> Union[Decimal, int]:
+    """
+    Solve one scenario for the field named by `solve_for`, given the target
+    monthly payment and the other two fields. A solved term longer than
+    max_term_months counts as no solution.
+    """
+    if solve_for == "amount":
+        return max_principal(payment, apr, term_months)
+    if solve_for == "apr":
+        return implied_apr(amount, payment, term_months)
+    if solve_for == "term_months":
+        n = payoff_term(amount, apr, payment, max_term_months)
+        if max_term_months is not None and n > max_term_months:
+            raise ValueError(f"payment is too small to repay the amount within {max_term_months} months")
+        return n
+    raise ValueError(f"solve_for must be one of {', '.join(SOLVE_TARGETS)}")
+
+
+def solve_scenarios(
+    solve_for: str,
+    amounts: Sequence[Optional[Decimal]],
+    aprs: Sequence[Optional[Decimal]],
+    term_months: Sequence[Optional[int]],
+    payments: Sequence[Decimal],
+    max_term_months: Optional[int] = None,
+) -> List[Solution]:
+    """
+    Batched solve_scenario. A scenario without a solution yields its ValueError
+    in place of a result, so one bad row does not fail the whole batch.
+    """
+    if not (len(amounts) == len(aprs) == len(term_months) == len(payments)):
+        raise ValueError("amounts, aprs, term_months and payments must have the same length")
+    results: List[Solution] = []
+    for amount, apr, term, payment in zip(amounts, aprs, term_months, payments):
+        try:
+            results.append(solve_scenario(solve_for, amount, apr, term, payment, max_term_months))
+        except ValueError as e:
+            results.append(e)
+    return results
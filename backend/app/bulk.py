@@ -0,0 +1,152 @@
+"""
+Streaming readers for bulk scenario imports.
+
+Each reader yields (row_number, record) pairs one at a time, where record is a
+dict of raw field values or a ValueError describing why the row could not be
+parsed. Row numbers start at 1 for the first data row.
+
+Bytes that are not valid UTF-8 fail only the row they are in (text_stream
+decodes with surrogateescape). Input that cannot be read further, a malformed
+CSV line or a decode error from a strict stream, ends the records with an
+error for the row being read, so rows before it are still imported.
+"""
+import csv
+import io
+import json
+import re
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
+
+Record = Union[dict, ValueError]
+
+T = TypeVar("T")
+
+FORMATS = ("json", "csv", "ndjson")
+
+_CONTENT_TYPES = {
+    "application/json": "json",
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+_EXTENSIONS = {".json": "json", ".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def detect_format(content_type: Optional[str], filename: Optional[str] = None) -> Optional[str]:
+    """
+    Input format from a content type, falling back to the file extension.
+    """
+    if content_type:
+        fmt = _CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+        if fmt:
+            return fmt
+    if filename:
+        for ext, fmt in _EXTENSIONS.items():
+            if filename.lower().endswith(ext):
+                return fmt
+    return None
+
+
+def text_stream(binary: IO[bytes]) -> IO[str]:
+    # invalid bytes become lone surrogates instead of failing the whole read
+    return io.TextIOWrapper(binary, encoding="utf-8", errors="surrogateescape", newline="")
+
+
+# what surrogateescape decodes invalid UTF-8 bytes to
+_UNDECODED = re.compile("[\udc80-\udcff]")
+
+
+def _unreadable(error: Exception) -> ValueError:
+    reason = "invalid UTF-8" if isinstance(error, UnicodeDecodeError) else f"malformed CSV: {error}"
+    return ValueError(f"{reason}; this and later rows were not read")
+
+
+def iter_csv_records(lines: Iterable[str]) -> Iterator[Tuple[int, Record]]:
+    reader = csv.DictReader(lines)
+    row_number = 0
+    try:
+        for row_number, row in enumerate(reader, start=1):
+            if None in row:
+                yield row_number, ValueError("too many fields")
+            elif any(_UNDECODED.search(value) for value in row.values() if value):
+                yield row_number, ValueError("invalid UTF-8")
+            else:
+                yield row_number, row
+    except (UnicodeDecodeError, csv.Error) as e:
+        yield row_number + 1, _unreadable(e)
+
+
+def iter_ndjson_records(lines: Iterable[str]) -> Iterator[Tuple[int, Record]]:
+    row_number = 0
+    try:
+        for line in lines:
+            if not line.strip():
+                continue
+            row_number += 1
+            if _UNDECODED.search(line):
+                yield row_number, ValueError("invalid UTF-8")
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                yield row_number, ValueError("invalid JSON")
+                continue
+            if isinstance(record, dict):
+                yield row_number, record
+            else:
+                yield row_number, ValueError("expected a JSON object")
+    except UnicodeDecodeError as e:
+        yield row_number + 1, _unreadable(e)
+
+
+def iter_json_records(fp: IO[str]) -> Iterator[Tuple[int, Record]]:
+    # a JSON array has to be parsed as a whole; use NDJSON for very large imports
+    try:
+        records = json.load(fp)
+    except json.JSONDecodeError:
+        raise ValueError("body is not valid JSON")
+    if not isinstance(records, list):
+        raise ValueError("expected a JSON array of scenarios")
+    return _iter_parsed(records)
+
+
+def _iter_parsed(records: list) -> Iterator[Tuple[int, Record]]:
+    for row_number, record in enumerate(records, start=1):
+        if isinstance(record, dict):
+            yield row_number, record
+        else:
+            yield row_number, ValueError("expected a JSON object")
+
+
+def iter_records(fp: IO[str], fmt: str) -> Iterator[Tuple[int, Record]]:
+    if fmt == "csv":
+        return iter_csv_records(fp)
+    if fmt == "ndjson":
+        return iter_ndjson_records(fp)
+    if fmt == "json":
+        return iter_json_records(fp)
+    raise ValueError(f"unsupported format {fmt!r}")
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def id_ranges(ids: Iterable[int]) -> List[List[int]]:
+    """
+    Collapse ids into inclusive [first, last] runs of consecutive values.
+    """
+    ranges: List[List[int]] = []
+    for i in sorted(ids):
+        if ranges and i == ranges[-1][1] + 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+    return ranges
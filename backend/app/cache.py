@@ -0,0 +1,108 @@
+"""
+Bounded in-process LRU caches for calculation results.
+
+Capacity and on/off switches are read from the environment:
+CALC_CACHE_ENABLED (default "true"), CALC_CACHE_SIZE for monthly payments and
+SCHEDULE_CACHE_SIZE for schedule previews. LOAN_RESPONSE_CACHE_SIZE (default 0,
+off) caches serialized GET /loans/{id} responses by loan id.
+"""
+import os
+from collections import OrderedDict
+from decimal import Decimal
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from app.config import env_flag
+
+
+class LRUCache:
+    """
+    Thread-safe mapping with a size limit that evicts the least recently used entry.
+    A disabled cache always computes and never stores anything.
+    """
+
+    def __init__(self, capacity: int, enabled: bool = True):
+        if capacity < 0:
+            raise ValueError("capacity must be >= 0")
+        self.capacity = capacity
+        self.enabled = enabled and capacity > 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return compute()
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        # compute outside the lock; a concurrent miss on the same key just
+        # computes the same value twice
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "capacity": self.capacity,
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def calc_key(amount: Decimal, apr: Decimal, term_months: int) -> Tuple[Decimal, Decimal, int]:
+    """
+    Normalized cache key, so 5.5 and 5.50 share one entry.
+    """
+    return (amount.normalize(), apr.normalize(), int(term_months))
+
+
+CALC_CACHE_ENABLED = env_flag("CALC_CACHE_ENABLED", "true")
+
+payment_cache = LRUCache(int(os.getenv("CALC_CACHE_SIZE", "4096")), enabled=CALC_CACHE_ENABLED)
+preview_cache = LRUCache(int(os.getenv("SCHEDULE_CACHE_SIZE", "1024")), enabled=CALC_CACHE_ENABLED)
+checkpoint_cache = LRUCache(int(os.getenv("SCHEDULE_CHECKPOINT_CACHE_SIZE", "1024")), enabled=CALC_CACHE_ENABLED)
+
+# saved loans never change, so their serialized detail responses stay valid
+# until the loan is deleted; off by default because each worker process has
+# its own copy and only sees deletes that it handled itself
+loan_response_cache = LRUCache(int(os.getenv("LOAN_RESPONSE_CACHE_SIZE", "0")))
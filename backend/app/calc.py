@@ -1,8 +1,12 @@
-from decimal import Decimal, getcontext, ROUND_HALF_UP
+from decimal import Decimal, getcontext, ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_UP
+from typing import List, Optional, Tuple
 
 # set precision high enough for intermediate calculations
 getcontext().prec = 28
 
+# longest term accepted by the API and the batch pricer
+MAX_TERM_MONTHS = 480
+
 def monthly_payment(amount: Decimal, apr_percent: Decimal, term_months: int) -> Decimal:
     """
     Calculate monthly payment and return Decimal rounded to cents (ROUND_HALF_UP).
@@ -15,43 +19,311 @@ def monthly_payment(amount: Decimal, apr_percent: Decimal, term_months: int) ->
     if apr_percent < 0 or apr_percent > 100:
         raise ValueError("apr must be between 0 and 100")
 
-    P = amount
+    return payment_from_denominator(amount, apr_percent, term_months, annuity_denominator(apr_percent, term_months))
+
+def round_cents(value: Decimal) -> Decimal:
+    return value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+def monthly_rate(apr_percent: Decimal) -> Decimal:
+    return apr_percent / Decimal('100') / Decimal('12')
+
+# precomputed denominators for standard APR ticks and terms, see app/annuity_table.py
+_annuity_table = None
+
+def set_annuity_table(table) -> None:
+    """
+    Install a table with a lookup(apr_percent, term_months) method returning the
+    exact live denominator or None; None removes it.
+    """
+    global _annuity_table
+    _annuity_table = table
+
+def annuity_denominator(apr_percent: Decimal, term_months: int) -> Optional[Decimal]:
+    """
+    The amount-independent part of the annuity formula, 1 - (1 + r) ** (-n).
+    This is the expensive exponentiation, so callers pricing many amounts at the
+    same (apr, term) compute it once and pass it to payment_from_denominator.
+    Served from the installed annuity table when it has the pair.
+    Returns None for 0% APR, which needs no exponentiation.
+    """
     if apr_percent == Decimal('0'):
+        return None
+    table = _annuity_table
+    if table is not None:
+        denominator = table.lookup(apr_percent, term_months)
+        if denominator is not None:
+            return denominator
+    return live_annuity_denominator(apr_percent, term_months)
+
+def live_annuity_denominator(apr_percent: Decimal, term_months: int) -> Decimal:
+    r = monthly_rate(apr_percent)  # monthly rate as Decimal
+    n = Decimal(term_months)
+    return 1 - (1 + r) ** (-n)
+
+def payment_from_denominator(amount: Decimal, apr_percent: Decimal, term_months: int, denominator: Optional[Decimal]) -> Decimal:
+    """
+    Monthly payment rounded to cents, using a precomputed annuity_denominator.
+    monthly_payment is built on this, so reusing a denominator gives identical results.
+    """
+    P = amount
+    if denominator is None:
         # no interest
         M = P / Decimal(term_months)
     else:
-        r = apr_percent / Decimal('100') / Decimal('12')  # monthly rate as Decimal
-        n = Decimal(term_months)
-        M = (P * r) / (1 - (1 + r) ** (-n))
+        r = monthly_rate(apr_percent)
+        M = (P * r) / denominator
 
     # round to cents
     return M.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
 def amortization_preview(amount: Decimal, apr_percent: Decimal, term_months: int, preview_months: int = 12):
-    M = monthly_payment(amount, apr_percent, term_months)
-    balance = amount
     schedule = []
+    rows = amortization_cents(amount, apr_percent, term_months, preview_months)
+    for m, (interest, principal, balance) in enumerate(rows, start=1):
+        schedule.append({
+            "month": m,
+            "interest_paid": format_cents(interest),
+            "principal_paid": format_cents(principal),
+            "remaining_balance": format_cents(balance)
+        })
+    return schedule
+
+# --- Integer-cents schedule recurrence ---
+
+CentsRow = Tuple[int, int, int]
+
+def amortization_cents(
+    amount: Decimal,
+    apr_percent: Decimal,
+    term_months: int,
+    preview_months: int = 12,
+    payment: Optional[Decimal] = None,
+) -> List[CentsRow]:
+    """
+    Month-by-month schedule rows as (interest, principal, balance) in integer
+    cents, each amount rounded to cents (ROUND_HALF_UP). Identical to carrying
+    the balance in Decimal, but the balance and payment stay integers and the
+    monthly interest is rounded with integer division instead of quantize.
+    `amount` must be whole cents; `payment` reuses an already computed
+    monthly_payment.
+    """
+    M = monthly_payment(amount, apr_percent, term_months) if payment is None else payment
+    months = min(term_months, preview_months)
+    amount_cents = amount.scaleb(2)
+    if amount_cents != amount_cents.to_integral_value():
+        raise ValueError("amount must be in whole cents")
+
+    balance = int(amount_cents)
+    rows: List[CentsRow] = []
     if apr_percent == Decimal('0'):
-        for m in range(1, min(term_months, preview_months)+1):
-            principal_paid = (amount / Decimal(term_months)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-            interest_paid = Decimal('0.00')
-            balance = (balance - principal_paid).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-            schedule.append({
-                "month": m,
-                "interest_paid": f"{interest_paid}",
-                "principal_paid": f"{principal_paid}",
-                "remaining_balance": f"{balance}"
-            })
+        principal = _to_cents(round_cents(amount / Decimal(term_months)))
+        for _ in range(months):
+            balance -= principal
+            rows.append((0, principal, balance))
+        return rows
+
+    payment_cents = _to_cents(M)
+    r = monthly_rate(apr_percent)
+    # r is already rounded to the context precision; as numerator / 10 ** scale
+    # it is exact, so interest in cents is balance * numerator / 10 ** scale
+    _, digits, exponent = r.as_tuple()
+    numerator = int("".join(map(str, digits)))
+    unit = 10 ** -exponent
+    prec = getcontext().prec
+    limit = 10 ** prec
+    for _ in range(months):
+        interest = _round_product(balance, numerator, unit, limit, prec)
+        if interest is None:
+            interest = _to_cents(round_cents(Decimal(balance).scaleb(-2) * r))
+        principal = payment_cents - interest
+        balance -= principal
+        rows.append((interest, principal, balance))
+    return rows
+
+def _to_cents(value: Decimal) -> int:
+    return int(value.scaleb(2))
+
+def format_cents(cents: int) -> str:
+    """
+    Integer cents as a plain decimal string with two places, like str() of a cent Decimal.
+    """
+    sign = "-" if cents < 0 else ""
+    whole, part = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{part:02d}"
+
+def _round_product(balance: int, numerator: int, unit: int, limit: int, prec: int) -> Optional[int]:
+    """
+    balance * numerator / unit rounded half up to an integer, exactly as
+    Decimal rounds the product to `prec` digits and then quantizes it. Returns
+    None when the product is rounded by the context so close to a half cent
+    that the two roundings could disagree; the caller then uses Decimal.
+    """
+    product = balance * numerator
+    magnitude = -product if product < 0 else product
+    cents, rem = divmod(magnitude, unit)
+    distance = 2 * rem - unit
+    if magnitude >= limit:
+        # Decimal keeps only `prec` digits of the product; that first rounding
+        # moves it by at most half of `ulp`, which only matters near a half cent
+        ulp = 10 ** (len(str(magnitude)) - prec)
+        if abs(distance) <= ulp:
+            return None
+    if distance >= 0:
+        cents += 1
+    return -cents if product < 0 else cents
+
+# --- Inverse solvers ---
+
+CENT = Decimal('0.01')
+APR_QUANTUM = Decimal('0.0001')
+MAX_APR = Decimal('100')
+APR_MAX_ITERATIONS = 200
+# stop once the monthly-rate bracket is narrower than this
+APR_RATE_TOLERANCE = Decimal('1e-15')
+
+def _check_payment(payment: Decimal) -> None:
+    if payment <= 0:
+        raise ValueError("payment must be > 0")
+
+def max_principal(payment: Decimal, apr_percent: Decimal, term_months: int) -> Decimal:
+    """
+    Largest amount, in cents, whose monthly_payment does not exceed `payment`.
+    Uses the closed form P = M * (1 - (1 + r) ** (-n)) / r, then nudges the
+    result by a cent where rounding of the payment puts it on the wrong side.
+    """
+    _check_payment(payment)
+    if term_months <= 0:
+        raise ValueError("term_months must be > 0")
+    if apr_percent < 0 or apr_percent > 100:
+        raise ValueError("apr must be between 0 and 100")
+
+    denominator = annuity_denominator(apr_percent, term_months)
+    if denominator is None:
+        P = payment * Decimal(term_months)
     else:
-        r = apr_percent / Decimal('100') / Decimal('12')
-        for m in range(1, min(term_months, preview_months)+1):
-            interest = (balance * r).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-            principal = (M - interest).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-            balance = (balance - principal).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-            schedule.append({
-                "month": m,
-                "interest_paid": f"{interest}",
-                "principal_paid": f"{principal}",
-                "remaining_balance": f"{balance}"
-            })
-    return schedule
+        P = payment * denominator / monthly_rate(apr_percent)
+    P = P.quantize(CENT, rounding=ROUND_FLOOR)
+
+    def fits(amount: Decimal) -> bool:
+        return payment_from_denominator(amount, apr_percent, term_months, denominator) <= payment
+
+    while P > 0 and not fits(P):
+        P -= CENT
+    while fits(P + CENT):
+        P += CENT
+    if P <= 0:
+        raise ValueError("payment is too small for any loan amount")
+    return P
+
+def payoff_term(amount: Decimal, apr_percent: Decimal, payment: Decimal, max_term_months: Optional[int] = None) -> int:
+    """
+    Fewest months whose monthly_payment does not exceed `payment`.
+    Uses the closed form n = -ln(1 - P * r / M) / ln(1 + r), then corrects for
+    cent rounding of the payment with a search around it: monthly_payment never
+    increases with the term, so the step doubles until the answer is bracketed
+    and the bracket is then bisected. With max_term_months, a longer term
+    raises ValueError before any search.
+    """
+    _check_payment(payment)
+    if amount <= 0:
+        raise ValueError("amount must be > 0")
+    if apr_percent < 0 or apr_percent > 100:
+        raise ValueError("apr must be between 0 and 100")
+
+    if apr_percent == 0:
+        n = amount / payment
+    else:
+        r = monthly_rate(apr_percent)
+        remaining = 1 - amount * r / payment
+        if remaining <= 0:
+            raise ValueError("payment does not cover the monthly interest")
+        n = -remaining.ln() / (1 + r).ln()
+    n = max(int(n.to_integral_value(rounding=ROUND_CEILING)), 1)
+
+    def fits(months: int) -> bool:
+        return monthly_payment(amount, apr_percent, months) <= payment
+
+    if max_term_months is not None and n > max_term_months:
+        # rounding can still let the capped term fit
+        if not fits(max_term_months):
+            raise ValueError(f"payment is too small to repay the amount within {max_term_months} months")
+        n = max_term_months
+
+    # bracket the answer in (low, high]: high fits, low does not (or is 0)
+    step = 1
+    if fits(n):
+        high = n
+        while high - step >= 1 and fits(high - step):
+            high -= step
+            step *= 2
+        low = max(high - step, 0)
+    else:
+        low = n
+        while not fits(low + step):
+            low += step
+            step *= 2
+        high = low + step
+    while high - low > 1:
+        middle = (low + high) // 2
+        if fits(middle):
+            high = middle
+        else:
+            low = middle
+    return high
+
+def _unrounded_payment(amount: Decimal, r: Decimal, n: int) -> Decimal:
+    if r == 0:
+        return amount / Decimal(n)
+    return amount * r / (1 - (1 + r) ** (-n))
+
+def _unrounded_payment_slope(amount: Decimal, r: Decimal, n: int) -> Decimal:
+    # derivative of P r / (1 - (1 + r)^-n) with respect to r
+    if r == 0:
+        return amount * Decimal(n + 1) / Decimal(2 * n)
+    growth = (1 + r) ** (-n)
+    denominator = 1 - growth
+    return amount / denominator - amount * r * n * growth / (1 + r) / (denominator * denominator)
+
+def implied_apr(amount: Decimal, payment: Decimal, term_months: int) -> Decimal:
+    """
+    APR (percent, 4 decimal places) at which `amount` over `term_months`
+    costs `payment` a month, before cent rounding.
+
+    Newton's method on the monthly rate, safeguarded by a bisection bracket:
+    any Newton step that leaves the bracket is replaced by a bisection step,
+    so the solver always converges, in at most APR_MAX_ITERATIONS steps.
+    """
+    _check_payment(payment)
+    if amount <= 0:
+        raise ValueError("amount must be > 0")
+    if term_months <= 0:
+        raise ValueError("term_months must be > 0")
+
+    lo = Decimal(0)
+    hi = monthly_rate(MAX_APR)
+    if payment <= _unrounded_payment(amount, lo, term_months):
+        if monthly_payment(amount, lo, term_months) <= payment:
+            return Decimal('0.0000')
+        raise ValueError("payment is too small to repay the amount at 0% APR")
+    if payment >= _unrounded_payment(amount, hi, term_months):
+        if monthly_payment(amount, MAX_APR, term_months) >= payment:
+            return MAX_APR.quantize(APR_QUANTUM)
+        raise ValueError("payment implies an APR above 100%")
+
+    # payment grows with the rate, so f(lo) < 0 < f(hi) throughout
+    r = (lo + hi) / 2
+    for _ in range(APR_MAX_ITERATIONS):
+        f = _unrounded_payment(amount, r, term_months) - payment
+        if f == 0:
+            break
+        if f < 0:
+            lo = r
+        else:
+            hi = r
+        if hi - lo < APR_RATE_TOLERANCE:
+            break
+        slope = _unrounded_payment_slope(amount, r, term_months)
+        candidate = r - f / slope if slope > 0 else lo
+        r = candidate if lo < candidate < hi else (lo + hi) / 2
+    return (r * Decimal('1200')).quantize(APR_QUANTUM, rounding=ROUND_HALF_UP)
+
@@ -0,0 +1,231 @@
+"""
+Offline batch pricer for files of scenarios.
+
+    python -m app.cli rates.csv -o priced.csv --workers 4 --summary
+
+Reads CSV, NDJSON or Parquet rows with amount, apr and term_months columns,
+prices each one exactly like ``app.calc.monthly_payment`` and writes CSV or
+NDJSON. Input is read, priced and written one chunk at a time (optionally in
+worker processes), so memory use does not grow with the input. Rows that
+cannot be priced are written with an error message instead of a payment.
+Needs neither the API nor a database; Parquet input needs pyarrow.
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from typing import IO, Iterator, List, Optional, Tuple
+
+from app.batch import monthly_payments
+from app.bulk import Record, chunked, detect_format, iter_csv_records, iter_ndjson_records
+from app.calc import MAX_TERM_MONTHS, monthly_payment
+from app.executor import PRICING_CHUNK_SIZE, PRICING_WORKERS, map_ordered, shutdown_pool
+from app.schedule import AmortizationSchedule
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - parquet input is optional
+    pq = None
+
+INPUT_FORMATS = ("csv", "ndjson", "parquet")
+OUTPUT_FORMATS = ("csv", "ndjson")
+COLUMNS = ("amount", "apr", "term_months")
+
+Scenario = Tuple[Decimal, Decimal, int]
+
+
+def to_decimal(value, field: str) -> Decimal:
+    if isinstance(value, bool):
+        raise ValueError(f"{field} is not a number")
+    if isinstance(value, float):
+        # shortest repr, the digits that were written in the file
+        value = repr(value)
+    try:
+        return Decimal(value.strip() if isinstance(value, str) else value)
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError(f"{field} is not a number")
+
+
+def parse_scenario(record: dict) -> Scenario:
+    """
+    (amount, apr, term_months) from raw field values, with calc's range checks.
+    """
+    missing = [c for c in COLUMNS if record.get(c) in (None, "")]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    amount = to_decimal(record["amount"], "amount")
+    apr = to_decimal(record["apr"], "apr")
+    term = to_decimal(record["term_months"], "term_months")
+    if not (amount.is_finite() and apr.is_finite() and term.is_finite()):
+        raise ValueError("values must be finite numbers")
+    if term != term.to_integral_value():
+        raise ValueError("term_months must be a whole number")
+    if term <= 0 or term > MAX_TERM_MONTHS:
+        raise ValueError(f"term_months must be between 1 and {MAX_TERM_MONTHS}")
+    if amount <= 0:
+        raise ValueError("amount must be > 0")
+    if apr < 0 or apr > 100:
+        raise ValueError("apr must be between 0 and 100")
+    return amount, apr, int(term)
+
+
+def iter_parquet_records(path: str, batch_size: int) -> Iterator[Tuple[int, Record]]:
+    if pq is None:
+        raise RuntimeError("reading Parquet needs pyarrow")
+    row_number = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=list(COLUMNS)):
+        for record in batch.to_pylist():
+            row_number += 1
+            yield row_number, record
+
+
+def output_header(fmt: str, summary: bool) -> str:
+    if fmt != "csv":
+        return ""
+    columns = ["row", *COLUMNS, "monthly_payment"]
+    if summary:
+        columns += ["total_interest", "total_paid"]
+    return ",".join(columns + ["error"]) + "\n"
+
+
+def price_chunk(job: Tuple[List[Tuple[int, Record]], str, bool]) -> Tuple[str, int, int]:
+    """
+    Parse, price and format one chunk. Returns the output text and the counts
+    of priced and failed rows. Runs in worker processes.
+    """
+    chunk, fmt, summary = job
+    parsed: List[Tuple[int, Optional[Scenario], str]] = []
+    for row_number, record in chunk:
+        if isinstance(record, ValueError):
+            parsed.append((row_number, None, str(record)))
+            continue
+        try:
+            parsed.append((row_number, parse_scenario(record), ""))
+        except ValueError as e:
+            parsed.append((row_number, None, str(e)))
+
+    valid = [scenario for _, scenario, _ in parsed if scenario is not None]
+    try:
+        payments = iter(monthly_payments([s[0] for s in valid], [s[1] for s in valid], [s[2] for s in valid]))
+    except ArithmeticError:
+        # one row out of Decimal's range fails the whole vector; price rows one by one
+        payments = iter([None] * len(valid))
+
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n") if fmt == "csv" else None
+    priced = 0
+    for row_number, scenario, error in parsed:
+        if scenario is not None:
+            try:
+                fields = [row_number, *price_scenario(scenario, next(payments), summary)]
+            except ArithmeticError:
+                scenario, error = None, "values are too large to price"
+        if scenario is None:
+            if writer:
+                writer.writerow([row_number, "", "", "", ""] + (["", ""] if summary else []) + [error])
+            else:
+                out.write(json.dumps({"row": row_number, "error": error}, separators=(",", ":")) + "\n")
+            continue
+        priced += 1
+        if writer:
+            writer.writerow(fields + [""])
+        else:
+            names = ("row", *COLUMNS, "monthly_payment", "total_interest", "total_paid")
+            # Decimals as plain JSON numbers, like the schedule export
+            out.write("{" + ",".join(f'"{n}":{v}' for n, v in zip(names, fields)) + "}\n")
+    return out.getvalue(), priced, len(parsed) - priced
+
+
+def price_scenario(scenario: Scenario, payment: Optional[Decimal], summary: bool) -> list:
+    """
+    Output fields after the row number; computes the payment when not given.
+    """
+    amount, apr, term = scenario
+    if payment is None:
+        payment = monthly_payment(amount, apr, term)
+    fields = [amount, apr, term, payment]
+    if summary:
+        schedule = AmortizationSchedule(amount, apr, term)
+        interest = schedule.total_interest()
+        fields += [interest, schedule.balance_at(0) + interest]
+    return fields
+
+
+def read_records(path: str, fmt: str, chunk_size: int) -> Iterator[Tuple[int, Record]]:
+    if fmt == "parquet":
+        yield from iter_parquet_records(path, chunk_size)
+        return
+    reader = iter_csv_records if fmt == "csv" else iter_ndjson_records
+    if path == "-":
+        yield from reader(sys.stdin)
+        return
+    with open(path, newline="", encoding="utf-8") as fp:
+        yield from reader(fp)
+
+
+def run(
+    input_path: str,
+    output: IO[str],
+    input_format: str,
+    output_format: str = "csv",
+    workers: int = PRICING_WORKERS,
+    chunk_size: int = PRICING_CHUNK_SIZE,
+    summary: bool = False,
+) -> Tuple[int, int]:
+    """
+    Price every row of the input into `output`; returns (priced, failed) counts.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    records = read_records(input_path, input_format, chunk_size)
+    jobs = ((chunk, output_format, summary) for chunk in chunked(records, chunk_size))
+    priced = failed = 0
+    output.write(output_header(output_format, summary))
+    for text, ok, bad in map_ordered(price_chunk, jobs, workers):
+        output.write(text)
+        priced += ok
+        failed += bad
+    return priced, failed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Price a file of loan scenarios without the API.")
+    parser.add_argument("input", help="CSV, NDJSON or Parquet file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS, help="default: from the input file extension")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, help="default: from the output file extension, else csv")
+    parser.add_argument("--workers", type=int, default=PRICING_WORKERS, help="worker processes; 0 or 1 prices in-process (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=PRICING_CHUNK_SIZE, help="rows per chunk (default: %(default)s)")
+    parser.add_argument("--summary", action="store_true", help="add lifetime total interest and total paid per row")
+    args = parser.parse_args(argv)
+
+    input_format = args.input_format or (
+        "parquet" if args.input.lower().endswith(".parquet") else detect_format(None, args.input)
+    )
+    if input_format not in INPUT_FORMATS:
+        parser.error("cannot tell the input format; pass --input-format")
+    if input_format == "parquet" and (pq is None or args.input == "-"):
+        parser.error("Parquet input needs pyarrow and a file path")
+    output_format = args.output_format or (detect_format(None, args.output) if args.output != "-" else None) or "csv"
+    if output_format not in OUTPUT_FORMATS:
+        parser.error("output format must be csv or ndjson")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be >= 1")
+
+    start = time.perf_counter()
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        priced, failed = run(args.input, output, input_format, output_format, args.workers, args.chunk_size, args.summary)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        shutdown_pool()
+    print(f"priced {priced} rows, {failed} failed, in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
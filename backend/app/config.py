@@ -0,0 +1,8 @@
+"""
+Helpers for reading settings from environment variables.
+"""
+import os
+
+
+def env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,117 @@
+"""
+Process pool for CPU-bound scenario pricing.
+
+Large pricing jobs are split into chunks that are priced in worker processes
+with the batch engine, so they no longer hold the GIL of the API worker.
+Chunks are mapped in order and each one is priced exactly like
+``app.calc.monthly_payment``, so results match the serial path bit for bit.
+
+Configured with PRICING_WORKERS (default 0: price in-process) and
+PRICING_CHUNK_SIZE (default 5000 scenarios per task). Inputs smaller than one
+chunk are always priced in-process. map_ordered streams arbitrary chunk jobs
+through the same pool for the offline CLI.
+"""
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from threading import Lock
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from app.batch import monthly_payments
+
+PRICING_WORKERS = int(os.getenv("PRICING_WORKERS", "0"))
+PRICING_CHUNK_SIZE = int(os.getenv("PRICING_CHUNK_SIZE", "5000"))
+# "spawn" avoids forking a process that already runs server threads
+PRICING_START_METHOD = os.getenv("PRICING_START_METHOD", "spawn")
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = Lock()
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Shared process pool, created on first use and recreated if the worker count changes.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(PRICING_START_METHOD))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool = None
+        _pool_workers = 0
+
+
+def _price_chunk(chunk: Tuple[Sequence[Decimal], Sequence[Decimal], Sequence[int], bool]) -> List[Decimal]:
+    amounts, aprs, term_months, exact = chunk
+    return monthly_payments(amounts, aprs, term_months, exact=exact)
+
+
+def price_scenarios(
+    amounts: Sequence[Decimal],
+    aprs: Sequence[Decimal],
+    term_months: Sequence[int],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    exact: bool = False,
+) -> List[Decimal]:
+    """
+    Monthly payments for many scenarios, in input order, spread over worker
+    processes when the input spans more than one chunk.
+    """
+    workers = PRICING_WORKERS if workers is None else workers
+    chunk_size = PRICING_CHUNK_SIZE if chunk_size is None else chunk_size
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    if not (len(amounts) == len(aprs) == len(term_months)):
+        raise ValueError("amounts, aprs and term_months must have the same length")
+    if workers <= 1 or len(amounts) <= chunk_size:
+        return monthly_payments(amounts, aprs, term_months, exact=exact)
+
+    chunks = [
+        (amounts[i:i + chunk_size], aprs[i:i + chunk_size], term_months[i:i + chunk_size], exact)
+        for i in range(0, len(amounts), chunk_size)
+    ]
+    results: List[Decimal] = []
+    # Executor.map yields results in submission order
+    for priced in get_pool(workers).map(_price_chunk, chunks):
+        results.extend(priced)
+    return results
+
+
+def map_ordered(fn: Callable[[T], R], items: Iterable[T], workers: int, max_pending: Optional[int] = None) -> Iterator[R]:
+    """
+    fn(item) for every item, in input order. With more than one worker the calls
+    run in the shared process pool with at most max_pending (default 2 per
+    worker) items submitted at once, so a long input is consumed as results
+    are taken instead of being read into memory up front like Executor.map.
+    fn must be a module-level function so worker processes can import it.
+    """
+    if workers <= 1:
+        for item in items:
+            yield fn(item)
+        return
+    pool = get_pool(workers)
+    max_pending = max_pending or 2 * workers
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,44 @@
+"""
+Sensitivity grids: monthly payments over APR x term x amount.
+
+The annuity denominator 1 - (1 + r) ** (-n) depends only on (apr, term), so it
+is computed once per pair and reused for every amount. Each cell then costs one
+multiply, one divide and one quantize, and equals monthly_payment exactly.
+"""
+from decimal import Decimal
+from typing import Iterator, List, Sequence, Tuple
+
+from app.calc import annuity_denominator, payment_from_denominator
+
+
+def range_count(start: Decimal, stop: Decimal, step: Decimal) -> int:
+    """
+    Number of values decimal_range would produce, without building them.
+    """
+    if step <= 0:
+        raise ValueError("step must be > 0")
+    if stop < start:
+        raise ValueError("stop must be >= start")
+    return int((stop - start) / step) + 1
+
+
+def decimal_range(start: Decimal, stop: Decimal, step: Decimal, max_count: int) -> List[Decimal]:
+    """
+    start, start + step, ... up to and including stop. Each value is computed as
+    start + i * step, so steps like 0.125 never accumulate error.
+    """
+    count = range_count(start, stop, step)
+    if count > max_count:
+        raise ValueError(f"range has {count} values, more than {max_count}")
+    return [start + i * step for i in range(count)]
+
+
+def iter_grid(aprs: Sequence[Decimal], terms: Sequence[int], amounts: Sequence[Decimal]) -> Iterator[Tuple[Decimal, int, List[Decimal]]]:
+    """
+    Yield (apr, term, payments) per (apr, term) pair in APR-major order, where
+    payments[i] is the monthly payment for amounts[i].
+    """
+    for apr in aprs:
+        for term in terms:
+            denominator = annuity_denominator(apr, term)
+            yield apr, term, [payment_from_denominator(amount, apr, term, denominator) for amount in amounts]
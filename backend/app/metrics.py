@@ -0,0 +1,205 @@
+"""
+Request and hot-path timing, exposed in the Prometheus text format.
+
+Durations are recorded in histograms: one for whole HTTP requests, labelled by
+method, route template and status, and one for stages inside a request
+(payment math, schedule previews, DB session lifetime, SQL statements, response
+serialization). Time a stage with
+
+    with timed("monthly_payment"):
+        ...
+
+Switched on with METRICS_ENABLED (default "false"). When disabled, timed()
+returns a shared no-op context manager and the middleware passes requests
+straight through, so the hooks cost a flag check.
+"""
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from app.config import env_flag
+
+METRICS_ENABLED = env_flag("METRICS_ENABLED", "false")
+
+# seconds; covers sub-millisecond math up to slow bulk requests
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Thread-safe histogram with one series per combination of label values.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        if len(label_values) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {', '.join(self.label_names)}")
+        # buckets are stored non-cumulative; the last slot counts values above every bound
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def samples(self, *label_values: str) -> Tuple[int, float]:
+        """
+        (count, sum) of one series.
+        """
+        with self._lock:
+            series = self._series.get(label_values)
+            return (sum(series[0]), series[1]) if series else (0, 0.0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for label_values, counts, total in snapshot:
+            labels = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, label_values))
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}'
+            cumulative += counts[-1]
+            yield f'{self.name}_bucket{{{prefix}le="+Inf"}} {cumulative}'
+            yield f"{self.name}_sum{{{labels}}} {total}"
+            yield f"{self.name}_count{{{labels}}} {cumulative}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._histograms: List[Histogram] = []
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str]) -> Histogram:
+        histogram = Histogram(name, documentation, label_names)
+        self._histograms.append(histogram)
+        return histogram
+
+    def clear(self) -> None:
+        for histogram in self._histograms:
+            histogram.clear()
+
+    def render(self) -> str:
+        lines = [line for histogram in self._histograms for line in histogram.render()]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry(enabled=METRICS_ENABLED)
+
+request_duration = registry.histogram(
+    "loan_api_request_duration_seconds", "Duration of HTTP requests.", ("method", "route", "status")
+)
+stage_duration = registry.histogram(
+    "loan_api_stage_duration_seconds", "Duration of timed stages within requests.", ("stage",)
+)
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        stage_duration.observe(time.perf_counter() - self.start, self.stage)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def timed(stage: str):
+    """
+    Context manager recording the duration of `stage`; a no-op when metrics are disabled.
+    """
+    if not registry.enabled:
+        return _NOOP
+    return _Timer(stage)
+
+
+def instrument_engine(engine) -> None:
+    """
+    Record every SQL statement run through a (sync) engine as the "db_execute" stage.
+    Async engines are instrumented through their sync_engine.
+    """
+    from sqlalchemy import event
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if starts:
+            start = starts.pop()
+            if registry.enabled:
+                stage_duration.observe(time.perf_counter() - start, "db_execute")
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    event.listen(engine, "after_cursor_execute", after_execute)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request durations by route template, so ids in
+    paths do not create a series each. Requests pass straight through when
+    metrics are disabled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not registry.enabled:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            request_duration.observe(time.perf_counter() - start, scope["method"], path, status)
@@ -0,0 +1,117 @@
+"""
+Minimal in-place schema upgrades for databases created by older versions.
+
+`SQLModel.metadata.create_all` only creates missing tables, so columns and
+indexes added to an existing table model are applied here on startup, new
+columns can be backfilled before their indexes are built, and float columns
+the model now declares as NUMERIC are converted.
+
+A backfill commits as it goes, so it can cover any number of rows. While it
+runs, a plain index named backfill_<table>_<column> exists on the column: it
+serves the backfill's own lookups by that column, and if it is still there on
+the next startup the backfill was interrupted and is run again.
+"""
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Column, Float, Numeric, Table, inspect, text
+from sqlalchemy.engine import Connection, Dialect
+
+
+def add_missing_columns(conn: Connection, table: Table) -> List[str]:
+    """
+    Add columns that exist on the model but not in the database and return
+    their names. New columns must be nullable, since existing rows have no
+    value for them.
+    """
+    inspector = inspect(conn)
+    if not inspector.has_table(table.name):
+        return []
+    existing = {c["name"] for c in inspector.get_columns(table.name)}
+    preparer = conn.dialect.identifier_preparer
+    added = []
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable:
+            raise RuntimeError(f"cannot add non-nullable column {table.name}.{column.name} to an existing table")
+        ddl_type = column.type.compile(dialect=conn.dialect)
+        conn.execute(text(
+            f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {ddl_type}"
+        ))
+        added.append(column.name)
+    return added
+
+
+def numeric_conversion_sql(table: Table, column: Column, dialect: Dialect) -> str:
+    """
+    PostgreSQL statement converting a float column to the column's NUMERIC type,
+    rounding existing values to its scale.
+    """
+    preparer = dialect.identifier_preparer
+    name = preparer.format_column(column)
+    return (
+        f"ALTER TABLE {preparer.format_table(table)} ALTER COLUMN {name} "
+        f"TYPE {column.type.compile(dialect=dialect)} USING round({name}::numeric, {column.type.scale})"
+    )
+
+
+def convert_float_columns(conn: Connection, table: Table) -> None:
+    """
+    Convert float columns that the model declares as NUMERIC. Only PostgreSQL
+    needs this: SQLite columns have no fixed type, and SQLAlchemy already reads
+    old float values back as Decimals rounded to the column's scale.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    inspector = inspect(conn)
+    if not inspector.has_table(table.name):
+        return
+    existing = {c["name"]: c["type"] for c in inspector.get_columns(table.name)}
+    for column in table.columns:
+        current = existing.get(column.name)
+        # Float subclasses Numeric, so check that the model's type is not a float
+        if isinstance(current, Float) and isinstance(column.type, Numeric) and not isinstance(column.type, Float):
+            conn.execute(text(numeric_conversion_sql(table, column, conn.dialect)))
+
+
+def add_missing_indexes(conn: Connection, table: Table) -> None:
+    inspector = inspect(conn)
+    if not inspector.has_table(table.name):
+        return
+    existing = {i["name"] for i in inspector.get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name not in existing:
+            index.create(bind=conn)
+
+
+def backfill_index_name(table: Table, column: str) -> str:
+    return f"backfill_{table.name}_{column}"
+
+
+def upgrade(conn: Connection, table: Table, backfills: Optional[Dict[str, Callable[[Connection], None]]] = None) -> None:
+    """
+    Bring an existing table up to date with the model, within the caller's transaction.
+    Works with sync connections directly and with async ones through run_sync.
+    backfills maps a column name to a function filling it in for existing rows;
+    it runs when that column is added, or again after an interrupted run, before
+    any index on it is built. The new column is committed before its backfill
+    starts and the backfill may commit in batches, so with backfills the
+    connection must come from engine.connect() rather than engine.begin(), and
+    the caller commits the rest.
+    """
+    added = add_missing_columns(conn, table)
+    convert_float_columns(conn, table)
+    preparer = conn.dialect.identifier_preparer
+    for name, backfill in (backfills or {}).items():
+        marker = backfill_index_name(table, name)
+        if name in added:
+            conn.execute(text(
+                f"CREATE INDEX {preparer.quote(marker)} ON {preparer.format_table(table)} "
+                f"({preparer.format_column(table.c[name])})"
+            ))
+            conn.commit()
+        elif marker not in {i["name"] for i in inspect(conn).get_indexes(table.name)}:
+            continue
+        backfill(conn)
+        conn.execute(text(f"DROP INDEX {preparer.quote(marker)}"))
+    add_missing_indexes(conn, table)
@@ -0,0 +1,114 @@
+"""
+Amortization with extra principal payments.
+
+Supports a recurring extra principal payment, one-off lump sums and recasting
+(re-amortizing the payment over the remaining term after a lump sum). Months
+are stepped with the same rounding rules as calc.amortization_preview: interest
+and principal are rounded to cents (ROUND_HALF_UP) every month and the balance
+is carried forward. Schedules are generated lazily and stop in the month the
+balance reaches zero, so summaries never hold a full schedule in memory.
+"""
+from decimal import Decimal
+from typing import Dict, Iterator, NamedTuple, Optional
+
+from app.calc import monthly_payment, monthly_rate, round_cents
+
+ZERO = Decimal('0.00')
+
+
+class PrepaymentRow(NamedTuple):
+    month: int
+    payment: Decimal
+    interest_paid: Decimal
+    principal_paid: Decimal
+    extra_principal: Decimal
+    remaining_balance: Decimal
+
+
+class PrepaymentSummary(NamedTuple):
+    monthly_payment: Decimal
+    payoff_month: int
+    total_interest: Decimal
+    baseline_total_interest: Decimal
+    interest_saved: Decimal
+    months_saved: int
+
+
+def iter_prepayment_schedule(
+    amount: Decimal,
+    apr_percent: Decimal,
+    term_months: int,
+    extra_monthly: Decimal = ZERO,
+    extra_start_month: int = 1,
+    lump_sums: Optional[Dict[int, Decimal]] = None,
+    recast: bool = False,
+) -> Iterator[PrepaymentRow]:
+    """
+    Yield one row per month until the loan is paid off.
+
+    The scheduled payment covers interest and principal; extra_monthly (from
+    extra_start_month on) and lump_sums[month] go straight to principal. With
+    recast=True the scheduled payment is recomputed over the remaining term
+    after each lump sum, instead of keeping the payment and shortening the loan.
+    Any balance left at the end of the term is settled with the last payment.
+    """
+    if extra_monthly < 0 or any(v < 0 for v in (lump_sums or {}).values()):
+        raise ValueError("extra payments must be >= 0")
+    lump_sums = lump_sums or {}
+    M = monthly_payment(amount, apr_percent, term_months)
+    r = monthly_rate(apr_percent)
+    balance = round_cents(amount)
+    zero_rate = apr_percent == 0
+
+    for month in range(1, term_months + 1):
+        interest = ZERO if zero_rate else round_cents(balance * r)
+        principal = round_cents(M - interest)
+        if principal >= balance or month == term_months:
+            principal = balance
+        extra = ZERO
+        if month >= extra_start_month:
+            extra += extra_monthly
+        lump = lump_sums.get(month, ZERO)
+        extra = min(round_cents(extra + lump), balance - principal)
+        balance -= principal + extra
+        yield PrepaymentRow(month, interest + principal, interest, principal, extra, balance)
+        if balance == 0:
+            return
+        if recast and lump > 0:
+            M = monthly_payment(balance, apr_percent, term_months - month)
+
+
+def _total_interest(rows: Iterator[PrepaymentRow]):
+    total = ZERO
+    last_month = 0
+    for row in rows:
+        total += row.interest_paid
+        last_month = row.month
+    return total, last_month
+
+
+def simulate_prepayment(
+    amount: Decimal,
+    apr_percent: Decimal,
+    term_months: int,
+    extra_monthly: Decimal = ZERO,
+    extra_start_month: int = 1,
+    lump_sums: Optional[Dict[int, Decimal]] = None,
+    recast: bool = False,
+) -> PrepaymentSummary:
+    """
+    Payoff month and interest saved compared with the same loan without
+    prepayments. Both schedules are streamed, not stored.
+    """
+    total, payoff_month = _total_interest(iter_prepayment_schedule(
+        amount, apr_percent, term_months, extra_monthly, extra_start_month, lump_sums, recast,
+    ))
+    baseline_total, baseline_month = _total_interest(iter_prepayment_schedule(amount, apr_percent, term_months))
+    return PrepaymentSummary(
+        monthly_payment=monthly_payment(amount, apr_percent, term_months),
+        payoff_month=payoff_month,
+        total_interest=total,
+        baseline_total_interest=baseline_total,
+        interest_saved=baseline_total - total,
+        months_saved=baseline_month - payoff_month,
+    )
@@ -0,0 +1,341 @@
+"""
+Full-term amortization schedules.
+
+Months are stepped with the same rules as the prepayment and ARM engines:
+starting from the amount rounded to cents, each month's interest is the
+balance times the monthly rate rounded to cents (ROUND_HALF_UP), principal is
+the rest of the rounded monthly payment, and the balance is carried forward.
+The month the principal would reach the balance, or the last month of the
+term, settles the whole remaining balance, so the schedule ends at exactly
+0.00. Every row, and the lifetime interest, is identical to the prepayment
+baseline of /loans/prepayment and to the month-by-month preview.
+
+Months are stepped in integer cents (calc.amortization_cents). The balance
+every CHECKPOINT_MONTHS months and the lifetime interest are kept in an LRU
+cache keyed by the normalized loan, so after the first full pass a window is
+stepped only from the nearest checkpoint before it, and a balance from at
+most CHECKPOINT_MONTHS - 1 months.
+
+ColumnarSchedule holds rows as arrays of integer cents for compact storage
+and fast serialization.
+"""
+import json
+from array import array
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from app.cache import calc_key, checkpoint_cache
+from app.calc import amortization_cents, annuity_denominator, format_cents, monthly_payment, payment_from_denominator, round_cents
+
+ZERO = Decimal('0.00')
+
+# months between cached balances; a window steps at most this many extra months
+CHECKPOINT_MONTHS = 12
+
+
+class ScheduleRow(NamedTuple):
+    month: int
+    interest_paid: Decimal
+    principal_paid: Decimal
+    remaining_balance: Decimal
+
+
+class ScheduleCheckpoints(NamedTuple):
+    # balance in cents after months 0, CHECKPOINT_MONTHS, 2 * CHECKPOINT_MONTHS, ...
+    balance: Tuple[int, ...]
+    total_interest: int
+
+
+class AmortizationSchedule:
+    """
+    Amortization schedule of a fixed-rate loan. Windows and balances are
+    stepped from the nearest cached checkpoint, so their cost depends on the
+    window size rather than the term. An already computed monthly payment can
+    be passed in; results are the same either way.
+    """
+
+    def __init__(
+        self,
+        amount: Decimal,
+        apr_percent: Decimal,
+        term_months: int,
+        payment: Optional[Decimal] = None,
+    ):
+        self.payment = monthly_payment(amount, apr_percent, term_months) if payment is None else payment
+        self.amount = amount
+        self.apr_percent = apr_percent
+        self.term_months = term_months
+        self._checkpoints: Optional[ScheduleCheckpoints] = None
+
+    @property
+    def checkpoints(self) -> ScheduleCheckpoints:
+        """
+        Checkpoint balances and lifetime interest, stepped over the whole term
+        on the first call for this loan.
+        """
+        if self._checkpoints is None:
+            self._checkpoints = checkpoint_cache.get_or_compute(
+                calc_key(self.amount, self.apr_percent, self.term_months),
+                self._step_checkpoints,
+            )
+        return self._checkpoints
+
+    def _step_checkpoints(self) -> ScheduleCheckpoints:
+        columns = self._step(to_cents(round_cents(self.amount)), 1, self.term_months)
+        balance = (to_cents(round_cents(self.amount)),) + tuple(columns.balance[CHECKPOINT_MONTHS - 1::CHECKPOINT_MONTHS])
+        return ScheduleCheckpoints(balance, sum(columns.interest))
+
+    def _step(self, balance: int, start: int, end: int) -> "ColumnarSchedule":
+        return step_columns(balance, self.apr_percent, self.term_months, start, end - start + 1, self.payment)
+
+    def _step_to(self, start: int, end: int) -> "ColumnarSchedule":
+        # months before `start` are stepped from the checkpoint then dropped
+        checkpoint = (start - 1) // CHECKPOINT_MONTHS
+        first = checkpoint * CHECKPOINT_MONTHS + 1
+        balance = self.checkpoints.balance[checkpoint] if checkpoint else to_cents(round_cents(self.amount))
+        columns = self._step(balance, first, end)
+        skip = start - first
+        if not skip:
+            return columns
+        return ColumnarSchedule(start, columns.interest[skip:], columns.principal[skip:], columns.balance[skip:])
+
+    def balance_at(self, month: int) -> Decimal:
+        """
+        Remaining balance after `month` payments, rounded to cents.
+        """
+        if month <= 0:
+            return round_cents(self.amount)
+        if month >= self.term_months:
+            return ZERO
+        if month % CHECKPOINT_MONTHS == 0:
+            return Decimal(self.checkpoints.balance[month // CHECKPOINT_MONTHS]).scaleb(-2)
+        return Decimal(self._step_to(month, month).balance[0]).scaleb(-2)
+
+    def total_interest(self) -> Decimal:
+        """
+        Interest over the whole schedule, equal to summing rows().
+        """
+        return Decimal(self.checkpoints.total_interest).scaleb(-2)
+
+    def window(self, start: int = 1, end: Optional[int] = None) -> "ColumnarSchedule":
+        """
+        Months start..end (inclusive) as integer cents.
+        """
+        if end is None:
+            end = self.term_months
+        if start < 1 or end > self.term_months or start > end:
+            raise ValueError("window must satisfy 1 <= start <= end <= term_months")
+        return self._step_to(start, end)
+
+    def rows(self, start: int = 1, end: Optional[int] = None) -> Iterator[ScheduleRow]:
+        """
+        Rows for months start..end (inclusive).
+        """
+        return self.window(start, end).rows()
+
+
+def stepped_columns(
+    amount: Decimal,
+    apr_percent: Decimal,
+    term_months: int,
+    months: int,
+    payment: Optional[Decimal] = None,
+) -> "ColumnarSchedule":
+    """
+    The first `months` months of the schedule as integer cents, zero after payoff.
+    """
+    if payment is None:
+        payment = monthly_payment(amount, apr_percent, term_months)
+    return step_columns(to_cents(round_cents(amount)), apr_percent, term_months, 1, min(months, term_months), payment)
+
+
+def step_columns(
+    balance: int,
+    apr_percent: Decimal,
+    term_months: int,
+    start_month: int,
+    months: int,
+    payment: Decimal,
+) -> "ColumnarSchedule":
+    """
+    `months` months from `start_month` on, given the balance in cents before
+    `start_month`, as integer cents, zero after payoff.
+    """
+    columns = ColumnarSchedule(start_month)
+    if balance > 0:
+        if apr_percent == 0:
+            steps: Iterable[Tuple[int, int, int]] = [(0, to_cents(payment), 0)] * months
+        else:
+            steps = amortization_cents(Decimal(balance).scaleb(-2), apr_percent, term_months, preview_months=months, payment=payment)
+        for month, (interest, principal, _) in enumerate(steps, start=start_month):
+            if principal >= balance or month == term_months:
+                # payoff month: settle the whole remaining balance
+                columns.append(interest, balance, 0)
+                break
+            balance -= principal
+            columns.append(interest, principal, balance)
+    padding = months - len(columns)
+    for column in (columns.interest, columns.principal, columns.balance):
+        column.extend([0] * padding)
+    return columns
+
+
+def iter_schedule(amount: Decimal, apr_percent: Decimal, term_months: int, start: int = 1, end: Optional[int] = None) -> Iterator[ScheduleRow]:
+    return AmortizationSchedule(amount, apr_percent, term_months).rows(start, end)
+
+
+class ScheduleCurves(NamedTuple):
+    monthly_payment: Decimal
+    # one entry per month 1..months; zero payment and balance after payoff
+    payment: List[Decimal]
+    cumulative_interest: List[Decimal]
+    balance: List[Decimal]
+
+
+def compare_curves(scenarios: Iterable[Tuple[Decimal, Decimal, int]], months: int) -> List[ScheduleCurves]:
+    """
+    Month-aligned curves for several (amount, apr, term_months) scenarios.
+    Scenarios with the same (apr, term) share one annuity denominator and exact
+    repeats share the curves themselves.
+    """
+    denominators: Dict[Tuple[Decimal, int], Optional[Decimal]] = {}
+    curves: Dict[Tuple[Decimal, Decimal, int], ScheduleCurves] = {}
+    result = []
+    for amount, apr, term in scenarios:
+        key = (amount, apr, term)
+        if key not in curves:
+            if (apr, term) not in denominators:
+                denominators[apr, term] = annuity_denominator(apr, term)
+            payment = payment_from_denominator(amount, apr, term, denominators[apr, term])
+            schedule = AmortizationSchedule(amount, apr, term, payment=payment)
+            curves[key] = _curves(schedule, months)
+        result.append(curves[key])
+    return result
+
+
+def _curves(schedule: AmortizationSchedule, months: int) -> ScheduleCurves:
+    payments, cumulative, balances = [], [], []
+    interest = ZERO
+    for row in schedule.rows(1, min(months, schedule.term_months)):
+        interest += row.interest_paid
+        payments.append(row.interest_paid + row.principal_paid)
+        cumulative.append(interest)
+        balances.append(row.remaining_balance)
+        if row.remaining_balance == 0:
+            break
+    padding = months - len(payments)
+    payments += [ZERO] * padding
+    cumulative += [interest] * padding
+    balances += [ZERO] * padding
+    return ScheduleCurves(schedule.payment, payments, cumulative, balances)
+
+
+CSV_HEADER = "month,interest_paid,principal_paid,remaining_balance\n"
+
+
+def _batched(lines: Iterator[str], rows_per_chunk: int) -> Iterator[str]:
+    # fewer, larger writes are much cheaper for a streaming response
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= rows_per_chunk:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def to_cents(value: Decimal) -> int:
+    """
+    Integer cents of an amount already rounded to cents.
+    """
+    return int(value.scaleb(2))
+
+
+class ColumnarSchedule:
+    """
+    Schedule stored column-wise as typed arrays of integer cents: 8 bytes per
+    value instead of a dict and four boxed numbers per row. Serializes straight
+    to JSON or CSV text without building per-row objects.
+    """
+
+    __slots__ = ("start_month", "interest", "principal", "balance")
+
+    def __init__(self, start_month: int = 1, interest=(), principal=(), balance=()):
+        if not (len(interest) == len(principal) == len(balance)):
+            raise ValueError("columns must have the same length")
+        self.start_month = start_month
+        self.interest = array("q", interest)
+        self.principal = array("q", principal)
+        self.balance = array("q", balance)
+
+    def append(self, interest_cents: int, principal_cents: int, balance_cents: int) -> None:
+        self.interest.append(interest_cents)
+        self.principal.append(principal_cents)
+        self.balance.append(balance_cents)
+
+    def __len__(self) -> int:
+        return len(self.balance)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ColumnarSchedule):
+            return NotImplemented
+        return (self.start_month, self.interest, self.principal, self.balance) == (
+            other.start_month, other.interest, other.principal, other.balance
+        )
+
+    def rows(self) -> Iterator[ScheduleRow]:
+        for i in range(len(self)):
+            yield ScheduleRow(
+                self.start_month + i,
+                Decimal(self.interest[i]).scaleb(-2),
+                Decimal(self.principal[i]).scaleb(-2),
+                Decimal(self.balance[i]).scaleb(-2),
+            )
+
+    def to_json(self) -> str:
+        """
+        JSON array of schedule items, amounts as JSON numbers with two decimals.
+        """
+        items = [
+            f'{{"month":{self.start_month + i},"interest_paid":{format_cents(interest)},'
+            f'"principal_paid":{format_cents(principal)},"remaining_balance":{format_cents(balance)}}}'
+            for i, (interest, principal, balance) in enumerate(zip(self.interest, self.principal, self.balance))
+        ]
+        return "[" + ",".join(items) + "]"
+
+    def iter_ndjson(self, rows_per_chunk: int = 120) -> Iterator[str]:
+        """
+        Newline-delimited JSON, one schedule item per month, in chunks of rows.
+        """
+        lines = (
+            f'{{"month":{self.start_month + i},"interest_paid":{format_cents(interest)},'
+            f'"principal_paid":{format_cents(principal)},"remaining_balance":{format_cents(balance)}}}\n'
+            for i, (interest, principal, balance) in enumerate(zip(self.interest, self.principal, self.balance))
+        )
+        return _batched(lines, rows_per_chunk)
+
+    def iter_csv(self, rows_per_chunk: int = 120) -> Iterator[str]:
+        """
+        CSV with a header line, in chunks of rows.
+        """
+        yield CSV_HEADER
+        lines = (
+            f"{self.start_month + i},{format_cents(interest)},{format_cents(principal)},{format_cents(balance)}\n"
+            for i, (interest, principal, balance) in enumerate(zip(self.interest, self.principal, self.balance))
+        )
+        yield from _batched(lines, rows_per_chunk)
+
+    def to_storage(self) -> str:
+        """
+        Compact JSON of the raw cent columns, for storing in the database.
+        """
+        return (
+            f'{{"start":{self.start_month},"interest":[{",".join(map(str, self.interest))}],'
+            f'"principal":[{",".join(map(str, self.principal))}],"balance":[{",".join(map(str, self.balance))}]}}'
+        )
+
+    @classmethod
+    def from_storage(cls, data: str) -> "ColumnarSchedule":
+        columns = json.loads(data)
+        return cls(columns["start"], columns["interest"], columns["principal"], columns["balance"])
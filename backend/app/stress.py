@@ -0,0 +1,249 @@
+"""
+Monte Carlo rate stress testing.
+
+Each saved loan keeps its APR for `fixed_months` and then resets every
+`reset_interval` months to its APR plus a stochastic shift, floored at 0% and
+optionally capped at `lifetime_cap` above the original APR. At each reset the
+payment is re-amortized from the remaining balance over the remaining term.
+The shift follows a mean-reverting random walk sampled once per reset:
+
+    x_k = x_{k-1} * (1 - mean_reversion * dt) + drift * dt + volatility * sqrt(dt) * z_k
+
+with dt = reset_interval / 12 years and z_k standard normal. Every loan is
+evaluated against the same paths, so the portfolio totals see one coherent
+rate scenario per path.
+
+Paths are NumPy arrays of shape (paths, resets), drawn in blocks of
+STRESS_BLOCK_PATHS, each from its own child of SeedSequence(seed), so a seed
+reproduces the same paths whatever the worker count and whichever other loans
+are in the run. A loan is evaluated for
+all paths at once: within a segment the rate and payment are fixed, so the
+balance after the segment comes from the closed form and the only Python loop
+is over resets. Values are float64 and not rounded to cents; they describe a
+distribution, not a statement.
+
+The work is split by path block and spread over the pricing process pool
+(PRICING_WORKERS): each job generates only its own block of paths and returns
+every loan's max payment and interest for those paths. The parent collects the
+blocks and computes the percentiles, so any number of loans uses as many
+workers as there are blocks. Without workers the blocks are evaluated one
+after the other in process and dropped when the run ends.
+"""
+import os
+from decimal import Decimal
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from app.executor import PRICING_WORKERS, map_ordered
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - stress testing needs numpy
+    np = None
+
+STRESS_BLOCK_PATHS = int(os.getenv("STRESS_BLOCK_PATHS", "10000"))
+# paths x resets of the rate shifts, and paths x loans of the per-path results
+STRESS_MAX_CELLS = int(os.getenv("STRESS_MAX_CELLS", "10000000"))
+
+DEFAULT_PERCENTILES = (1.0, 5.0, 25.0, 50.0, 75.0, 95.0, 99.0)
+# largest integer a JSON client reading numbers as doubles keeps exactly
+MAX_SEED = 2 ** 53 - 1
+
+# (id, amount, apr, term_months)
+StressLoan = Tuple[int, Decimal, Decimal, int]
+
+
+class StressModel(NamedTuple):
+    paths: int
+    seed: int
+    # percentage points per year
+    volatility: float = 1.0
+    drift: float = 0.0
+    mean_reversion: float = 0.0
+    fixed_months: int = 12
+    reset_interval: int = 12
+    lifetime_cap: Optional[float] = None
+
+
+class LoanStress(NamedTuple):
+    id: int
+    monthly_payment: float
+    # one value per requested percentile
+    max_payment: List[float]
+    payment_shock: List[float]
+    total_interest: List[float]
+
+
+class StressResult(NamedTuple):
+    percentiles: List[float]
+    loans: List[LoanStress]
+    # per-path sums over every loan
+    portfolio_total_interest: List[float]
+    portfolio_payment_shock: List[float]
+
+
+def new_seed() -> int:
+    """
+    Fresh entropy for a run, at most MAX_SEED; returned to the caller so the
+    run can be repeated.
+    """
+    if np is None:
+        raise RuntimeError("stress testing needs numpy")
+    return int(np.random.SeedSequence().generate_state(1, np.uint64)[0] >> 11)
+
+
+def reset_steps(term_months: int, model: StressModel) -> int:
+    if term_months <= model.fixed_months:
+        return 0
+    return -(-(term_months - model.fixed_months) // model.reset_interval)
+
+
+def path_blocks(model: StressModel, block_paths: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    (start, stop) path ranges drawn from one seed each.
+    """
+    block_paths = block_paths or STRESS_BLOCK_PATHS
+    return [(start, min(start + block_paths, model.paths)) for start in range(0, model.paths, block_paths)]
+
+
+def generate_block(model: StressModel, steps: int, block: int, block_paths: Optional[int] = None) -> "np.ndarray":
+    """
+    Rate shifts in percentage points of one block of paths, shape (block paths, steps).
+    """
+    if np is None:
+        raise RuntimeError("stress testing needs numpy")
+    dt = model.reset_interval / 12.0
+    start, stop = path_blocks(model, block_paths)[block]
+    # the block-th child of SeedSequence(seed).spawn()
+    child = np.random.SeedSequence(model.seed, spawn_key=(block,))
+    # drawn reset by reset, so the first k resets do not depend on how many follow
+    z = np.random.default_rng(child).standard_normal((steps, stop - start)).T
+    shocks = model.drift * dt + model.volatility * np.sqrt(dt) * z
+    if model.mean_reversion == 0:
+        return np.cumsum(shocks, axis=1)
+    keep = 1.0 - model.mean_reversion * dt
+    shifts = np.empty((stop - start, steps))
+    level = np.zeros(stop - start)
+    for step in range(steps):
+        level = level * keep + shocks[:, step]
+        shifts[:, step] = level
+    return shifts
+
+
+def generate_paths(model: StressModel, steps: int) -> "np.ndarray":
+    """
+    Rate shifts in percentage points, shape (paths, steps).
+    """
+    return np.concatenate([generate_block(model, steps, block) for block in range(len(path_blocks(model)))])
+
+
+def evaluate_loan(amount: float, apr: float, term_months: int, model: StressModel, shifts: "np.ndarray"):
+    """
+    (initial payment, max payment per path, total interest per path).
+    """
+    paths = shifts.shape[0]
+    steps = reset_steps(term_months, model)
+    balance = np.full(paths, amount)
+    interest = np.zeros(paths)
+    ceiling = 100.0 if model.lifetime_cap is None else min(100.0, apr + model.lifetime_cap)
+    start = 0
+    initial = max_payment = None
+    for segment in range(steps + 1):
+        if segment == 0:
+            annual = np.full(paths, apr)
+            end = min(model.fixed_months, term_months)
+        else:
+            annual = np.clip(apr + shifts[:, segment - 1], 0.0, ceiling)
+            end = min(start + model.reset_interval, term_months)
+        rate = annual / 1200.0
+        log_growth = np.log1p(rate)
+        length = end - start
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # annuity payment over the remaining term, then the closed-form principal repaid
+            payment = balance * rate / -np.expm1(-(term_months - start) * log_growth)
+            payment = np.where(rate == 0, balance / (term_months - start), payment)
+            repaid = (payment - balance * rate) * np.expm1(length * log_growth) / rate
+            repaid = np.where(rate == 0, payment * length, repaid)
+        interest += payment * length - repaid
+        balance = balance - repaid
+        if segment == 0:
+            initial = float(payment[0])
+            max_payment = payment
+        else:
+            max_payment = np.maximum(max_payment, payment)
+        start = end
+    return initial, max_payment, interest
+
+
+def _stress_block(job: Tuple[Sequence[StressLoan], StressModel, int, int, int]):
+    # one job per block of paths; the block size travels with the job so pool
+    # workers split the paths exactly like the parent
+    loans, model, steps, block, block_paths = job
+    shifts = generate_block(model, steps, block, block_paths)
+    initial = np.empty(len(loans))
+    max_payment = np.empty((len(loans), shifts.shape[0]))
+    interest = np.empty((len(loans), shifts.shape[0]))
+    for i, (_, amount, apr, term_months) in enumerate(loans):
+        initial[i], max_payment[i], interest[i] = evaluate_loan(float(amount), float(apr), term_months, model, shifts)
+    return initial, max_payment, interest
+
+
+def _percentiles(values: "np.ndarray", percentiles: Sequence[float]) -> List[float]:
+    return [round(v, 2) for v in np.percentile(values, percentiles).tolist()]
+
+
+def run_stress(
+    loans: Sequence[StressLoan],
+    model: StressModel,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    workers: int = PRICING_WORKERS,
+) -> StressResult:
+    """
+    Percentiles of max payment, payment shock (max payment minus the initial
+    payment) and total interest per loan, and of the portfolio sums per path.
+    """
+    if np is None:
+        raise RuntimeError("stress testing needs numpy")
+    if not loans:
+        raise ValueError("no loans to stress")
+    if model.paths < 1:
+        raise ValueError("paths must be >= 1")
+    if model.fixed_months < 1 or model.reset_interval < 1:
+        raise ValueError("fixed_months and reset_interval must be >= 1")
+    steps = max(reset_steps(term, model) for _, _, _, term in loans)
+    if model.paths * max(steps, 1) > STRESS_MAX_CELLS:
+        raise ValueError(f"{model.paths} paths x {steps} resets is more than {STRESS_MAX_CELLS} rate values")
+    if model.paths * len(loans) > STRESS_MAX_CELLS:
+        raise ValueError(f"{model.paths} paths x {len(loans)} loans is more than {STRESS_MAX_CELLS} per-path results")
+    percentiles = tuple(percentiles)
+
+    blocks = path_blocks(model)
+    jobs = [(loans, model, steps, block, STRESS_BLOCK_PATHS) for block in range(len(blocks))]
+    if workers <= 1:
+        evaluated = map(_stress_block, jobs)
+    else:
+        evaluated = map_ordered(_stress_block, jobs, workers)
+    initial = np.zeros(len(loans))
+    max_payment = np.empty((len(loans), model.paths))
+    interest = np.empty((len(loans), model.paths))
+    for (start, stop), (block_initial, block_max_payment, block_interest) in zip(blocks, evaluated):
+        # the initial payment does not depend on the paths
+        initial = block_initial
+        max_payment[:, start:stop] = block_max_payment
+        interest[:, start:stop] = block_interest
+    shock = max_payment - initial[:, None]
+    results = [
+        LoanStress(
+            id=loan_id,
+            monthly_payment=round(float(initial[i]), 2),
+            max_payment=_percentiles(max_payment[i], percentiles),
+            payment_shock=_percentiles(shock[i], percentiles),
+            total_interest=_percentiles(interest[i], percentiles),
+        )
+        for i, (loan_id, _, _, _) in enumerate(loans)
+    ]
+    return StressResult(
+        percentiles=list(percentiles),
+        loans=results,
+        portfolio_total_interest=_percentiles(interest.sum(axis=0), percentiles),
+        portfolio_payment_shock=_percentiles(shock.sum(axis=0), percentiles),
+    )
@@ -0,0 +1,83 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from app.annuity_table import AnnuityTable, configure_annuity_table
+from app.calc import annuity_denominator, live_annuity_denominator, monthly_payment, set_annuity_table
+
+
+@pytest.fixture
+def small_table():
+    return AnnuityTable.build(Decimal("2"))
+
+
+@pytest.fixture
+def installed(small_table):
+    set_annuity_table(small_table)
+    yield small_table
+    set_annuity_table(None)
+
+
+class TestAnnuityTable:
+    """Test suite for the precomputed annuity denominators"""
+
+    def test_entries_equal_live_denominators(self, small_table):
+        """Test every stored denominator equals the live computation"""
+        assert len(small_table) == 400 * 40
+        for tick in range(1, 401):
+            apr = Decimal(tick) / 200
+            for term in range(12, 481, 12):
+                assert small_table.lookup(apr, term) == live_annuity_denominator(apr, term)
+
+    def test_lookup_misses(self, small_table):
+        """Test APRs off the tick grid, beyond the table or odd terms are not served"""
+        assert small_table.lookup(Decimal("1.001"), 360) is None
+        assert small_table.lookup(Decimal("2.005"), 360) is None
+        assert small_table.lookup(Decimal("1.5"), 100) is None
+        assert small_table.lookup(Decimal("1.5"), 492) is None
+        assert small_table.lookup(Decimal("1.125"), 360) is not None
+
+    def test_save_and_load(self, small_table, tmp_path):
+        """Test a saved table memory-maps back with identical entries"""
+        path = tmp_path / "annuity.bin"
+        small_table.save(str(path))
+        loaded = AnnuityTable.load(str(path))
+        assert loaded.max_tick == small_table.max_tick
+        assert loaded.lookup(Decimal("0.375"), 180) == small_table.lookup(Decimal("0.375"), 180)
+        assert loaded.lookup(Decimal("2"), 480) == live_annuity_denominator(Decimal("2"), 480)
+
+    def test_load_rejects_other_files(self, tmp_path):
+        """Test loading a file without the table header raises ValueError"""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"x" * 64)
+        with pytest.raises(ValueError, match="not a compatible annuity table"):
+            AnnuityTable.load(str(path))
+
+    def test_payments_round_like_live_path(self, installed):
+        """Test payments priced from the table equal live payments"""
+        rng = random.Random(18)
+        for _ in range(500):
+            amount = Decimal(rng.randint(100, 10 ** 8)) / Decimal(100)
+            apr = Decimal(rng.randint(0, 400)) / Decimal(200)
+            term = 12 * rng.randint(1, 40)
+            table_payment = monthly_payment(amount, apr, term)
+            set_annuity_table(None)
+            live_payment = monthly_payment(amount, apr, term)
+            set_annuity_table(installed)
+            assert table_payment == live_payment
+
+    def test_calc_falls_back_to_live_path(self, installed):
+        """Test pairs outside the table are still computed"""
+        assert annuity_denominator(Decimal("5.5"), 360) == live_annuity_denominator(Decimal("5.5"), 360)
+        assert annuity_denominator(Decimal("0"), 360) is None
+
+    def test_configure(self, small_table, tmp_path):
+        """Test ANNUITY_TABLE settings install a loaded table or none"""
+        path = tmp_path / "annuity.bin"
+        small_table.save(str(path))
+        try:
+            assert configure_annuity_table(str(path)).max_tick == 400
+            assert configure_annuity_table("off") is None
+        finally:
+            set_annuity_table(None)
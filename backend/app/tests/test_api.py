@@ -1,10 +1,15 @@
+import json
 import pytest
 from decimal import Decimal
 from fastapi.testclient import TestClient
-from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel import SQLModel, Session, create_engine, select
 from sqlalchemy.pool import StaticPool
 
-from app.main import app, get_session, LoanScenario
+from app import main
+from app.cache import LRUCache
+from app.calc import monthly_payment
+from app.main import app, get_session, LoanScenario, SCHEDULE_PREVIEW_VERSION
+from app.schedule import AmortizationSchedule, iter_schedule
 
 
 @pytest.fixture
@@ -114,3 +119,565 @@ def test_full_schedule_returned_for_short_term(client):
     assert len(preview) == 6
     # Check final remaining balance is 0.00
     assert preview[-1]["remaining_balance"] == 0.0
+
+
+def test_calculate_batch_matches_single_calculation(client):
+    payload = {
+        "amount": [250000, 150000, 12000],
+        "apr": [5.5, 4.25, 0],
+        "term_months": [360, 180, 6],
+    }
+    resp = client.post("/loans/calculate/batch", json=payload)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["monthly_payment"] == [1419.47, 1128.42, 2000.0]
+    single = client.post("/loans/calculate", json={"amount": 150000, "apr": 4.25, "term_months": 180})
+    assert single.json()["monthly_payment"] == data["monthly_payment"][1]
+
+
+def test_calculate_batch_validation(client):
+    # columns must line up
+    r1 = client.post("/loans/calculate/batch", json={"amount": [1000, 2000], "apr": [5], "term_months": [12]})
+    assert r1.status_code == 422
+    # per-element rules match the single endpoint
+    r2 = client.post("/loans/calculate/batch", json={"amount": [1000], "apr": [101], "term_months": [12]})
+    assert r2.status_code == 422
+
+
+def test_export_schedule_ndjson_full_term(client):
+    loan_id = client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360}).json()["id"]
+    resp = client.get(f"/loans/{loan_id}/schedule")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(rows) == 360
+    assert rows[0]["month"] == 1
+    assert rows[-1]["remaining_balance"] == 0.0
+
+
+def test_export_schedule_csv_window(client):
+    loan_id = client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360}).json()["id"]
+    resp = client.get(f"/loans/{loan_id}/schedule", params={"format": "csv", "start": 240, "end": 252})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    lines = resp.text.splitlines()
+    assert lines[0] == "month,interest_paid,principal_paid,remaining_balance"
+    assert len(lines) == 14
+    assert lines[1].startswith("240,")
+    assert lines[-1].startswith("252,")
+
+
+def test_export_schedule_errors(client):
+    assert client.get("/loans/9999/schedule").status_code == 404
+    loan_id = client.post("/loans", json={"amount": 12000, "apr": 0, "term_months": 6}).json()["id"]
+    assert client.get(f"/loans/{loan_id}/schedule", params={"start": 7}).status_code == 422
+    assert client.get(f"/loans/{loan_id}/schedule", params={"format": "xml"}).status_code == 422
+
+
+def test_cache_stats_endpoint(client):
+    client.delete("/admin/cache")
+    client.post("/loans/calculate", json={"amount": 250000, "apr": 5.5, "term_months": 360})
+    client.post("/loans/calculate", json={"amount": 250000, "apr": 5.50, "term_months": 360})
+    resp = client.get("/admin/cache")
+    assert resp.status_code == 200
+    stats = resp.json()
+    assert stats["schedule_preview"]["misses"] == 1
+    assert stats["schedule_preview"]["hits"] == 1
+    assert stats["monthly_payment"]["hits"] >= 1
+
+
+def test_get_loan_uses_stored_schedule_preview(client, test_engine):
+    loan_id = client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360}).json()["id"]
+    with Session(test_engine) as session:
+        record = session.get(LoanScenario, loan_id)
+        assert record.preview_json is not None
+        # a marker row proves the read path returns the stored preview
+        record.preview_json = '{"start":1,"interest":[100],"principal":[200],"balance":[305]}'
+        session.add(record)
+        session.commit()
+    preview = client.get(f"/loans/{loan_id}").json()["schedule_preview"]
+    assert preview == [{"month": 1, "interest_paid": 1.0, "principal_paid": 2.0, "remaining_balance": 3.05}]
+
+
+def test_get_loan_recomputes_stale_schedule_preview(client, test_engine):
+    created = client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360}).json()
+    with Session(test_engine) as session:
+        record = session.get(LoanScenario, created["id"])
+        record.preview_json = None
+        record.preview_version = None
+        session.add(record)
+        session.commit()
+    resp = client.get(f"/loans/{created['id']}")
+    assert resp.json()["schedule_preview"] == created["schedule_preview"]
+    with Session(test_engine) as session:
+        record = session.get(LoanScenario, created["id"])
+        assert record.preview_json is not None
+        assert record.preview_version == SCHEDULE_PREVIEW_VERSION
+
+
+def test_list_loans_keyset_pagination(client):
+    for amount in (1000, 2000, 3000, 4000, 5000):
+        client.post("/loans", json={"amount": amount, "apr": 5, "term_months": 12})
+    first = client.get("/loans", params={"limit": 2})
+    assert [r["amount"] for r in first.json()] == [5000, 4000]
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/loans", params={"limit": 2, "cursor": cursor})
+    assert [r["amount"] for r in second.json()] == [3000, 2000]
+    third = client.get("/loans", params={"limit": 2, "cursor": second.headers["X-Next-Cursor"]})
+    assert [r["amount"] for r in third.json()] == [1000]
+    assert "X-Next-Cursor" not in third.headers
+
+
+def test_list_loans_filters(client):
+    client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360})
+    client.post("/loans", json={"amount": 150000, "apr": 4.25, "term_months": 180})
+    client.post("/loans", json={"amount": 20000, "apr": 7, "term_months": 60})
+    resp = client.get("/loans", params={"min_amount": 100000, "max_apr": 5})
+    assert [r["amount"] for r in resp.json()] == [150000]
+    resp = client.get("/loans", params={"min_term": 120, "max_term": 360})
+    assert [r["amount"] for r in resp.json()] == [150000, 250000]
+
+
+def test_list_loans_invalid_cursor(client):
+    resp = client.get("/loans", params={"cursor": "not-a-cursor"})
+    assert resp.status_code == 422
+
+
+def test_get_loan_conditional_requests(client):
+    loan_id = client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360}).json()["id"]
+    resp = client.get(f"/loans/{loan_id}")
+    etag = resp.headers["ETag"]
+    assert resp.headers["Cache-Control"] == "no-cache"
+    assert "Last-Modified" in resp.headers
+
+    not_modified = client.get(f"/loans/{loan_id}", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+    assert client.get(f"/loans/{loan_id}", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    since = client.get(f"/loans/{loan_id}", headers={"If-Modified-Since": resp.headers["Last-Modified"]})
+    assert since.status_code == 304
+    earlier = client.get(f"/loans/{loan_id}", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+    assert earlier.status_code == 200
+
+
+def test_list_loans_etag_changes_with_rows(client):
+    client.post("/loans", json={"amount": 1000, "apr": 5, "term_months": 12})
+    first = client.get("/loans")
+    etag = first.headers["ETag"]
+    assert client.get("/loans", headers={"If-None-Match": etag}).status_code == 304
+
+    created = client.post("/loans", json={"amount": 2000, "apr": 5, "term_months": 12}).json()
+    after_create = client.get("/loans", headers={"If-None-Match": etag})
+    assert after_create.status_code == 200
+    assert after_create.headers["ETag"] != etag
+
+    client.delete(f"/loans/{created['id']}")
+    # back to the same rows, so the original representation is current again
+    assert client.get("/loans", headers={"If-None-Match": etag}).status_code == 304
+
+    # SQLite hands the deleted id to the next insert; a different row under it changes the ETag
+    reused = client.post("/loans", json={"amount": 3000, "apr": 5, "term_months": 12}).json()
+    assert reused["id"] == created["id"]
+    etag = client.get("/loans").headers["ETag"]
+    client.delete(f"/loans/{reused['id']}")
+    client.post("/loans", json={"amount": 4000, "apr": 5, "term_months": 12})
+    after_reuse = client.get("/loans", headers={"If-None-Match": etag})
+    assert after_reuse.status_code == 200
+    assert after_reuse.json()[0]["amount"] == 4000
+
+
+def test_loan_response_cache_invalidated_by_delete(client, monkeypatch):
+    cache = LRUCache(16)
+    monkeypatch.setattr(main, "loan_response_cache", cache)
+    loan_id = client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360}).json()["id"]
+    first = client.get(f"/loans/{loan_id}")
+    second = client.get(f"/loans/{loan_id}")
+    assert second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert cache.stats()["hits"] == 1
+    assert client.get(f"/loans/{loan_id}", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    client.delete(f"/loans/{loan_id}")
+    assert client.get(f"/loans/{loan_id}").status_code == 404
+
+
+def test_loan_summary(client):
+    empty = client.get("/loans/summary").json()
+    assert empty["count"] == 0
+    assert empty["weighted_average_apr"] is None
+
+    client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360})
+    client.post("/loans", json={"amount": 50000, "apr": 2.5, "term_months": 120})
+    summary = client.get("/loans/summary").json()
+    assert summary["count"] == 2
+    assert summary["total_principal"] == 300000
+    assert summary["total_monthly_payment"] == pytest.approx(1419.47 + 471.35)
+    assert summary["weighted_average_apr"] == 5.0
+    assert summary["weighted_average_term_months"] == 320
+    expected = sum(
+        AmortizationSchedule(Decimal(a), Decimal(r), n).total_interest()
+        for a, r, n in [("250000", "5.5", 360), ("50000", "2.5", 120)]
+    )
+    assert summary["total_lifetime_interest"] == float(expected)
+
+    filtered = client.get("/loans/summary", params={"max_apr": 3}).json()
+    assert filtered["count"] == 1
+    assert filtered["total_principal"] == 50000
+
+
+def test_loan_summary_sums_interest_stored_on_save(client, test_engine):
+    client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360})
+    client.post("/loans/bulk", json=[{"amount": 1000, "apr": 5, "term_months": 12}])
+    with Session(test_engine) as session:
+        stored = {record.amount: record.total_interest for record in session.exec(select(LoanScenario))}
+    assert stored == {
+        Decimal("250000"): AmortizationSchedule(Decimal("250000"), Decimal("5.5"), 360).total_interest(),
+        Decimal("1000"): AmortizationSchedule(Decimal("1000"), Decimal("5"), 12).total_interest(),
+    }
+    summary = client.get("/loans/summary").json()
+    assert summary["total_lifetime_interest"] == float(sum(stored.values()))
+
+
+def test_compare_loans(client):
+    saved = client.post("/loans", json={"amount": 200000, "apr": 6, "term_months": 360}).json()
+    other = client.post("/loans", json={"amount": 10000, "apr": 6, "term_months": 24}).json()
+    resp = client.post("/loans/compare", json={
+        "ids": [other["id"], saved["id"]],
+        "scenarios": [{"amount": 150000, "apr": 6, "term_months": 360}],
+        "months": 36,
+    })
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["months"] == 36
+    assert [loan["id"] for loan in body["loans"]] == [other["id"], saved["id"], None]
+    assert body["loans"][1]["monthly_payment"] == saved["monthly_payment"]
+
+    short = body["loans"][0]
+    rows = list(iter_schedule(Decimal("10000"), Decimal("6"), 24))
+    assert short["balance"][:24] == [float(r.remaining_balance) for r in rows]
+    assert short["balance"][24:] == [0.0] * 12
+    assert short["payment"][24:] == [0.0] * 12
+    assert short["cumulative_interest"][-1] == float(sum(r.interest_paid for r in rows))
+    assert all(len(loan["balance"]) == 36 for loan in body["loans"])
+
+    # without months the curves span the longest term
+    assert client.post("/loans/compare", json={"ids": [other["id"]]}).json()["months"] == 24
+
+
+def test_compare_loans_errors(client):
+    assert client.post("/loans/compare", json={}).status_code == 422
+    resp = client.post("/loans/compare", json={"ids": [12345, 54321]})
+    assert resp.status_code == 404
+    assert "12345, 54321" in resp.json()["detail"]
+
+
+def test_arm_paths(client):
+    payload = {
+        "amount": 300000, "apr": 5, "term_months": 360,
+        "fixed_months": 60, "margin": 2.75,
+        "initial_cap": 2, "periodic_cap": 2, "lifetime_cap": 5,
+        "index_paths": [[2.25], [6], [6, 6, 0]],
+    }
+    resp = client.post("/loans/arm", json=payload)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["initial_monthly_payment"] == 1610.46
+    flat, rising, falling = body["paths"]
+    assert set(flat["rates"]) == {5.0}
+    # re-amortizing at an unchanged rate moves the payment by at most a cent
+    assert flat["max_payment"] == pytest.approx(1610.46, abs=0.011)
+    assert rising["rates"][:3] == [7.0, 8.75, 8.75]
+    assert rising["total_interest"] > flat["total_interest"]
+    assert falling["rates"][:3] == [7.0, 8.75, 6.75]
+    assert all(len(p["rates"]) == 25 and p["payoff_month"] == 360 for p in body["paths"])
+
+    payload["fixed_months"] = 400
+    assert client.post("/loans/arm", json=payload).status_code == 422
+
+
+def test_stress_saved_loans(client):
+    first = client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360}).json()
+    second = client.post("/loans", json={"amount": 30000, "apr": 7, "term_months": 60}).json()
+    payload = {"paths": 500, "seed": 11, "volatility": 1.5, "percentiles": [5, 50, 95]}
+    resp = client.post("/loans/stress", json=payload)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["seed"] == 11
+    assert body["percentiles"] == [5, 50, 95]
+    assert [loan["id"] for loan in body["loans"]] == [first["id"], second["id"]]
+    assert body["loans"][0]["monthly_payment"] == first["monthly_payment"]
+    assert len(body["portfolio"]["total_interest"]) == 3
+    # the same seed repeats the run
+    assert client.post("/loans/stress", json=payload).json() == body
+
+    only = client.post("/loans/stress", json={**payload, "ids": [second["id"]]}).json()
+    assert only["loans"] == body["loans"][1:]
+    assert isinstance(client.post("/loans/stress", json={"paths": 10}).json()["seed"], int)
+    assert client.post("/loans/stress", json={"paths": 10, "seed": 2 ** 53}).status_code == 422
+
+
+def test_stress_errors(client):
+    assert client.post("/loans/stress", json={}).status_code == 422
+    assert client.post("/loans/stress", json={"ids": [999]}).status_code == 404
+    assert client.post("/loans/stress", json={"paths": 0}).status_code == 422
+
+
+def test_create_loan_stores_exact_decimals(client, test_engine):
+    created = client.post("/loans", json={"amount": "98765.43", "apr": "6.125", "term_months": 84}).json()
+    with Session(test_engine) as session:
+        record = session.get(LoanScenario, created["id"])
+    assert record.amount == Decimal("98765.43")
+    assert record.apr == Decimal("6.125")
+    assert record.monthly_payment == Decimal(str(created["monthly_payment"]))
+    assert client.get(f"/loans/{created['id']}").json() == created
+
+
+def test_create_loan_rejects_sub_cent_amounts(client):
+    assert client.post("/loans", json={"amount": 1000.005, "apr": 5, "term_months": 12}).status_code == 422
+    assert client.post("/loans", json={"amount": 1000, "apr": 5.1234567, "term_months": 12}).status_code == 422
+
+
+def test_unsaved_scenarios_accept_any_precision(client):
+    payload = {"amount": "1000.005", "apr": "5.1234567", "term_months": 12}
+    calculated = client.post("/loans/calculate", json=payload)
+    assert calculated.status_code == 200
+    assert calculated.json()["monthly_payment"] == float(monthly_payment(Decimal("1000.005"), Decimal("5.1234567"), 12))
+    assert client.post("/loans/prepayment", json={**payload, "extra_monthly": 10}).status_code == 200
+    assert client.post("/loans/compare", json={"scenarios": [payload]}).status_code == 200
+    arm = {**payload, "term_months": 360, "fixed_months": 60, "margin": 2.75, "index_paths": [[3]]}
+    assert client.post("/loans/arm", json=arm).status_code == 200
+
+
+def test_create_loan_returns_existing_duplicate(client):
+    payload = {"amount": 250000, "apr": 5.5, "term_months": 360}
+    created = client.post("/loans", json=payload).json()
+    # the same scenario written differently is the same row
+    again = client.post("/loans", json={"amount": "250000.00", "apr": "5.500", "term_months": 360})
+    assert again.status_code == 200
+    assert again.json() == created
+    assert len(client.get("/loans").json()) == 1
+
+
+def test_create_loan_idempotency_key(client):
+    payload = {"amount": 1000, "apr": 5, "term_months": 12}
+    headers = {"Idempotency-Key": "save-1"}
+    created = client.post("/loans", json=payload, headers=headers).json()
+    assert client.post("/loans", json=payload, headers=headers).json() == created
+    conflict = client.post("/loans", json={**payload, "amount": 2000}, headers=headers)
+    assert conflict.status_code == 409
+    # a new key for already saved content still returns the saved row
+    assert client.post("/loans", json=payload, headers={"Idempotency-Key": "save-2"}).json()["id"] == created["id"]
+    assert client.post("/loans", json=payload, headers={"Idempotency-Key": "x" * 256}).status_code == 422
+
+
+def test_create_loan_recovers_from_concurrent_insert(client, test_engine, monkeypatch):
+    payload = {"amount": 4321, "apr": 3, "term_months": 24}
+    # the lookup misses, then another request inserts the same scenario before the commit
+    real_pick = main.pick_duplicate
+    calls = []
+
+    def racing_pick(records, content_hash, key):
+        calls.append(content_hash)
+        if len(calls) == 1:
+            with Session(test_engine) as other:
+                record, _ = main.new_loan_record(main.LoanCreate(**payload))
+                other.add(record)
+                other.commit()
+            return None
+        return real_pick(records, content_hash, key)
+
+    monkeypatch.setattr(main, "pick_duplicate", racing_pick)
+    resp = client.post("/loans", json=payload)
+    assert resp.status_code == 200
+    assert len(calls) == 2
+    assert len(client.get("/loans").json()) == 1
+
+
+def test_bulk_create_skips_duplicates(client):
+    saved = client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360}).json()
+    payload = [
+        {"amount": 250000, "apr": 5.5, "term_months": 360},
+        {"amount": 1000, "apr": 5, "term_months": 12},
+        {"amount": "1000.00", "apr": 5, "term_months": 12},
+    ]
+    data = client.post("/loans/bulk", json=payload).json()
+    assert data["inserted"] == 1
+    assert data["duplicates"] == 2
+    assert data["error_count"] == 0
+    assert data["id_ranges"] == [[saved["id"] + 1, saved["id"] + 1]]
+    # an imported scenario is then found by create
+    assert client.post("/loans", json={"amount": 1000, "apr": 5, "term_months": 12}).json()["id"] == saved["id"] + 1
+
+
+def test_bulk_create_from_json_array(client):
+    payload = [
+        {"amount": 250000, "apr": 5.5, "term_months": 360},
+        {"amount": 0, "apr": 5.5, "term_months": 360},
+        {"amount": 150000, "apr": 4.25, "term_months": 180},
+    ]
+    resp = client.post("/loans/bulk", json=payload)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["inserted"] == 2
+    assert data["duplicates"] == 0
+    assert data["error_count"] == 1
+    assert data["errors"][0]["row"] == 2
+    assert data["id_ranges"] == [[1, 2]]
+    loans = client.get("/loans").json()
+    assert sorted(r["monthly_payment"] for r in loans) == [1128.42, 1419.47]
+    # previews are filled in on first read
+    detail = client.get("/loans/1").json()
+    assert len(detail["schedule_preview"]) == 12
+
+
+def test_bulk_create_from_csv_upload(client):
+    csv_body = "amount,apr,term_months\n250000,5.5,360\n12000,0,6\nabc,5,12\n"
+    resp = client.post("/loans/bulk", files={"file": ("loans.csv", csv_body, "text/csv")})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["inserted"] == 2
+    assert [e["row"] for e in data["errors"]] == [3]
+
+
+def test_bulk_create_from_ndjson_body(client):
+    body = '{"amount": 250000, "apr": 5.5, "term_months": 360}\n\nnot json\n{"amount": 1000, "apr": 5, "term_months": 12}\n'
+    resp = client.post("/loans/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["inserted"] == 2
+    assert data["errors"] == [{"row": 2, "detail": "invalid JSON"}]
+
+
+def test_bulk_create_reports_unreadable_input_after_first_chunk(client, monkeypatch):
+    monkeypatch.setattr("app.main.BULK_CHUNK_SIZE", 1)
+    body = b"amount,apr,term_months\n1000,5,12\n2000,5,\xff\xfe12\n3000,5,12\n"
+    resp = client.post("/loans/bulk", content=body, headers={"Content-Type": "text/csv"})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["inserted"] == 2
+    assert data["errors"] == [{"row": 2, "detail": "invalid UTF-8"}]
+
+    # a CSV line the reader cannot get past ends the import, keeping the chunks before it
+    body = "amount,apr,term_months\n4000,5,12\n5000,5,\"" + "1" * 200000 + "\"\n6000,5,12\n"
+    data = client.post("/loans/bulk", content=body, headers={"Content-Type": "text/csv"}).json()
+    assert data["inserted"] == 1
+    assert data["errors"][0]["row"] == 2
+    assert data["errors"][0]["detail"].startswith("malformed CSV")
+    body = b'{"amount": 7000, "apr": 5, "term_months": 12}\n{"amount": "\xff"}\n'
+    data = client.post("/loans/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}).json()
+    assert data["inserted"] == 1
+    assert data["errors"] == [{"row": 2, "detail": "invalid UTF-8"}]
+
+
+def test_bulk_create_rejects_unknown_input(client):
+    assert client.post("/loans/bulk", content="x", headers={"Content-Type": "text/plain"}).status_code == 415
+    assert client.post("/loans/bulk", json={"amount": 1000}).status_code == 422
+
+
+def test_grid_returns_apr_term_amount_matrix(client):
+    payload = {
+        "apr": {"start": 5, "stop": 5.5, "step": 0.5},
+        "term_months": [180, 360],
+        "amount": {"values": [150000, 250000]},
+    }
+    resp = client.post("/loans/grid", json=payload)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["apr"] == [5.0, 5.5]
+    assert data["term_months"] == [180, 360]
+    assert data["amount"] == [150000, 250000]
+    # apr 5.5%, 360 months, 250000
+    assert data["monthly_payment"][1][1][1] == 1419.47
+
+
+def test_grid_streams_ndjson(client):
+    payload = {"apr": {"values": [4.25, 5.5]}, "term_months": [180, 360], "amount": {"values": [150000]}}
+    resp = client.post("/loans/grid", params={"stream": True}, json=payload)
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert lines[0] == {"apr": [4.25, 5.5], "term_months": [180, 360], "amount": [150000]}
+    assert len(lines) == 5
+    assert lines[1] == {"apr": 4.25, "term_months": 180, "monthly_payment": [1128.42]}
+
+
+def test_grid_validation(client):
+    base = {"apr": {"values": [5]}, "term_months": [360], "amount": {"values": [1000]}}
+    assert client.post("/loans/grid", json={**base, "apr": {"values": [101]}}).status_code == 422
+    assert client.post("/loans/grid", json={**base, "amount": {"start": 1, "stop": 2}}).status_code == 422
+    assert client.post("/loans/grid", json={**base, "term_months": [0]}).status_code == 422
+
+
+def test_grid_rejects_oversized_ranges_before_expanding(client):
+    base = {"apr": {"values": [5]}, "term_months": [360], "amount": {"values": [1000]}}
+    resp = client.post("/loans/grid", json={**base, "amount": {"start": 1, "stop": 3000000, "step": 1}})
+    assert resp.status_code == 422
+    assert "3000000 cells" in resp.json()["detail"]
+    # far past anything that could be expanded in memory
+    resp = client.post("/loans/grid", json={**base, "amount": {"start": 1, "stop": 10**30, "step": 1}})
+    assert resp.status_code == 422
+    # the range's end values are checked without expanding it
+    assert client.post("/loans/grid", json={**base, "apr": {"start": 90, "stop": 110, "step": 1}}).status_code == 422
+
+
+def test_solve_for_amount_apr_and_term(client):
+    r1 = client.post("/loans/solve", json={"solve_for": "amount", "monthly_payment": 1419.47, "apr": 5.5, "term_months": 360})
+    assert r1.status_code == 200
+    assert r1.json()["amount"] == 250000.43
+    assert r1.json()["monthly_payment"] == 1419.47
+    r2 = client.post("/loans/solve", json={"solve_for": "apr", "monthly_payment": 1419.47, "amount": 250000, "term_months": 360})
+    assert r2.json()["apr"] == 5.5
+    r3 = client.post("/loans/solve", json={"solve_for": "term_months", "monthly_payment": 1419.47, "amount": 250000, "apr": 5.5})
+    assert r3.json()["term_months"] == 360
+
+
+def test_solve_errors(client):
+    # the field being solved needs the other two
+    r1 = client.post("/loans/solve", json={"solve_for": "apr", "monthly_payment": 1000, "amount": 100000})
+    assert r1.status_code == 422
+    # payment below the monthly interest never pays the loan off
+    r2 = client.post("/loans/solve", json={"solve_for": "term_months", "monthly_payment": 100, "amount": 250000, "apr": 5.5})
+    assert r2.status_code == 422
+    assert r2.json()["detail"] == "payment does not cover the monthly interest"
+    # a term far past the cap is rejected without searching up to it
+    r3 = client.post("/loans/solve", json={"solve_for": "term_months", "monthly_payment": "1", "amount": "1e9", "apr": "0"})
+    assert r3.status_code == 422
+    assert "within 480 months" in r3.json()["detail"]
+
+
+def test_solve_batch_reports_rows_without_solution(client):
+    payload = {
+        "solve_for": "term_months",
+        "monthly_payment": [1419.47, 100, 1128.42],
+        "amount": [250000, 250000, 150000],
+        "apr": [5.5, 5.5, 4.25],
+    }
+    resp = client.post("/loans/solve/batch", json=payload)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["result"] == [360, None, 180]
+    assert [e["row"] for e in data["errors"]] == [2]
+
+
+def test_prepayment_simulation(client):
+    payload = {
+        "amount": 250000,
+        "apr": 5.5,
+        "term_months": 360,
+        "extra_monthly": 200,
+        "lump_sums": [{"month": 12, "amount": 10000}],
+        "include_schedule": True,
+    }
+    resp = client.post("/loans/prepayment", json=payload)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["monthly_payment"] == 1419.47
+    assert data["payoff_month"] < 360
+    assert data["interest_saved"] > 0
+    assert len(data["schedule"]) == data["payoff_month"]
+    assert data["schedule"][11]["extra_principal"] == 10200.0
+    assert data["schedule"][-1]["remaining_balance"] == 0.0
+    # schedule rows are only returned on request
+    del payload["include_schedule"]
+    assert client.post("/loans/prepayment", json=payload).json()["schedule"] is None
@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+import pytest
+
+from app.arm import ArmEngine, ArmTerms, evaluate_paths, iter_arm_schedule, reset_count
+from app.prepayment import iter_prepayment_schedule
+
+# 5/1 ARM with 2/2/5 caps and the margin as floor
+TERMS = ArmTerms(
+    initial_apr=Decimal('5'),
+    fixed_months=60,
+    margin=Decimal('2.75'),
+    initial_cap=Decimal('2'),
+    periodic_cap=Decimal('2'),
+    lifetime_cap=Decimal('5'),
+    floor=Decimal('2.75'),
+)
+
+
+class TestArm:
+    """Test suite for the adjustable-rate schedule engine"""
+
+    def test_flat_path_matches_fixed_rate(self):
+        """Test an index path that keeps the initial rate gives the fixed-rate schedule"""
+        rows = list(iter_arm_schedule(Decimal('200000'), 360, TERMS, [Decimal('2.25')]))
+        fixed = list(iter_prepayment_schedule(Decimal('200000'), Decimal('5'), 360))
+        assert [r.remaining_balance for r in rows[:60]] == [r.remaining_balance for r in fixed[:60]]
+        assert rows[-1].remaining_balance == Decimal('0.00')
+        assert {r.apr for r in rows} == {Decimal('5')}
+
+    def test_caps_and_floor(self):
+        """Test each reset respects the initial, periodic and lifetime caps and the floor"""
+        assert TERMS.next_rate(Decimal('5'), Decimal('10'), first=True) == Decimal('7')
+        assert TERMS.next_rate(Decimal('7'), Decimal('10'), first=False) == Decimal('9')
+        assert TERMS.next_rate(Decimal('9'), Decimal('10'), first=False) == Decimal('10')
+        assert TERMS.next_rate(Decimal('5'), Decimal('-1'), first=True) == Decimal('3')
+        assert TERMS.next_rate(Decimal('3'), Decimal('-1'), first=False) == Decimal('2.75')
+
+    def test_payment_reamortized_at_reset(self):
+        """Test the payment changes at each reset and the loan still ends on time"""
+        rows = list(iter_arm_schedule(Decimal('200000'), 360, TERMS, [Decimal('6')]))
+        assert rows[59].payment < rows[60].payment
+        assert rows[60].apr == Decimal('7')
+        assert rows[72].apr == Decimal('8.75')
+        assert len(rows) == 360
+        assert rows[-1].remaining_balance == Decimal('0.00')
+
+    def test_engine_matches_schedule(self):
+        """Test memoized results equal stepping every path month by month"""
+        paths = [
+            [Decimal('2'), Decimal('4'), Decimal('6')],
+            [Decimal('2'), Decimal('4'), Decimal('1')],
+            [Decimal('3.5')],
+            [Decimal('0'), Decimal('9'), Decimal('2'), Decimal('5.125')],
+        ]
+        for path, result in zip(paths, evaluate_paths(Decimal('350000'), 360, TERMS, paths)):
+            rows = list(iter_arm_schedule(Decimal('350000'), 360, TERMS, path))
+            assert result.total_interest == sum(r.interest_paid for r in rows)
+            assert result.payoff_month == rows[-1].month
+            assert result.max_payment == max(r.payment for r in rows[:-1])
+            resets = [rows[m] for m in range(60, 360, 12)]
+            assert result.rates == [r.apr for r in resets]
+
+    def test_shared_prefixes_are_stepped_once(self):
+        """Test paths sharing reset rates reuse the months before they diverge"""
+        engine = ArmEngine(Decimal('100000'), 360, TERMS)
+        assert engine.months_stepped == 60
+        engine.run([Decimal('3'), Decimal('3'), Decimal('5')])
+        assert engine.months_stepped == 360
+        engine.run([Decimal('3'), Decimal('3'), Decimal('4')])
+        assert engine.months_stepped == 360 + 360 - 84
+        # indexes clamping to the same capped rate share a branch
+        first = engine.run([Decimal('20')])
+        before = engine.months_stepped
+        second = engine.run([Decimal('30')])
+        assert engine.months_stepped == before
+        assert first == second
+
+    def test_short_term_and_validation(self):
+        """Test the last reset is cut at the end of the term and invalid terms are rejected"""
+        terms = TERMS._replace(fixed_months=6, reset_interval=5)
+        assert reset_count(20, terms) == 3
+        result = ArmEngine(Decimal('5000'), 20, terms).run([Decimal('1')])
+        assert result.payoff_month == 20
+        with pytest.raises(ValueError, match="fixed_months"):
+            ArmEngine(Decimal('5000'), 20, terms._replace(fixed_months=30))
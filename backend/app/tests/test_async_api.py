@@ -0,0 +1,85 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import async_database_url, pool_options
+from app.main import app as sync_app, async_router, get_async_session, use_async_routes
+
+
+@pytest.fixture
+def async_client():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+    async def get_test_session():
+        async with AsyncSession(engine) as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(async_router)
+    app.dependency_overrides[get_async_session] = get_test_session
+    # one client context keeps a single event loop for the aiosqlite connection
+    with TestClient(app) as client:
+        client.portal.call(create_tables)
+        yield client
+        client.portal.call(engine.dispose)
+
+
+def test_async_create_and_get_loan(async_client):
+    resp = async_client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360})
+    assert resp.status_code == 200
+    created = resp.json()
+    assert created["monthly_payment"] == 1419.47
+    assert len(created["schedule_preview"]) == 12
+    detail = async_client.get(f"/loans/{created['id']}")
+    assert detail.json() == created
+    etag = detail.headers["ETag"]
+    assert async_client.get(f"/loans/{created['id']}", headers={"If-None-Match": etag}).status_code == 304
+    # saving it again returns the same row
+    assert async_client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360}).json() == created
+    headers = {"Idempotency-Key": "k"}
+    async_client.post("/loans", json={"amount": 1000, "apr": 5, "term_months": 12}, headers=headers)
+    assert async_client.post("/loans", json={"amount": 2000, "apr": 5, "term_months": 12}, headers=headers).status_code == 409
+
+
+def test_async_list_loans_pagination(async_client):
+    for amount in (1000, 2000, 3000):
+        async_client.post("/loans", json={"amount": amount, "apr": 5, "term_months": 12})
+    first = async_client.get("/loans", params={"limit": 2})
+    assert [r["amount"] for r in first.json()] == [3000, 2000]
+    second = async_client.get("/loans", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert [r["amount"] for r in second.json()] == [1000]
+
+
+def test_async_delete_and_schedule_export(async_client):
+    loan_id = async_client.post("/loans", json={"amount": 12000, "apr": 0, "term_months": 6}).json()["id"]
+    export = async_client.get(f"/loans/{loan_id}/schedule", params={"format": "csv"})
+    assert len(export.text.splitlines()) == 7
+    assert async_client.delete(f"/loans/{loan_id}").status_code == 200
+    assert async_client.get(f"/loans/{loan_id}").status_code == 404
+    assert async_client.delete(f"/loans/{loan_id}").status_code == 404
+
+
+def test_use_async_routes_replaces_matching_routes():
+    app = FastAPI()
+    app.router.routes.extend(sync_app.router.routes)
+    use_async_routes(app, async_router)
+    endpoints = {(r.path, tuple(sorted(r.methods))): r.endpoint.__name__ for r in app.routes if hasattr(r, "methods")}
+    assert endpoints[("/loans", ("POST",))] == "create_loan_async"
+    assert endpoints[("/loans/{loan_id}", ("GET",))] == "get_loan_async"
+    # routes without an async counterpart stay in place
+    assert endpoints[("/loans/calculate", ("POST",))] == "calculate_loan"
+
+
+def test_engine_url_and_pool_options():
+    assert async_database_url("postgresql://u:p@db:5432/loans") == "postgresql+asyncpg://u:p@db:5432/loans"
+    assert async_database_url("sqlite:///loans.db") == "sqlite+aiosqlite:///loans.db"
+    assert pool_options("sqlite://") == {}
+    assert set(pool_options("postgresql://db/loans")) == {"pool_size", "max_overflow", "pool_pre_ping", "pool_recycle"}
@@ -0,0 +1,60 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from app.batch import monthly_payments, monthly_payments_exact
+from app.calc import monthly_payment
+
+
+class TestBatchMonthlyPayments:
+    """Test suite for the batched monthly payment engine"""
+
+    def test_matches_scalar_for_known_loans(self):
+        """Test batch results equal monthly_payment for the reference loans"""
+        amounts = [Decimal('200000'), Decimal('12000'), Decimal('10000'), Decimal('250000')]
+        aprs = [Decimal('6'), Decimal('0'), Decimal('0'), Decimal('5.5')]
+        terms = [360, 12, 3, 360]
+        result = monthly_payments(amounts, aprs, terms)
+        assert result == [Decimal('1199.10'), Decimal('1000.00'), Decimal('3333.33'), Decimal('1419.47')]
+        assert all(r.as_tuple().exponent == -2 for r in result)
+
+    def test_randomized_matches_scalar(self):
+        """Test batch results match the scalar function across random scenarios"""
+        rng = random.Random(1234)
+        amounts, aprs, terms = [], [], []
+        for _ in range(2000):
+            amounts.append(Decimal(rng.randint(1, 200000000)) / Decimal(100))
+            aprs.append(Decimal(rng.choice([0, rng.randint(0, 2000), rng.randint(0, 100000)])) / Decimal(1000))
+            terms.append(rng.randint(1, 480))
+        expected = [monthly_payment(a, r, n) for a, r, n in zip(amounts, aprs, terms)]
+        result = monthly_payments(amounts, aprs, terms)
+        assert [str(r) for r in result] == [str(e) for e in expected]
+
+    def test_half_cent_boundary_uses_exact_path(self):
+        """Test a result exactly on a half cent rounds up like the scalar path"""
+        # 0.05 / 2 = 0.025 -> 0.03 with ROUND_HALF_UP
+        result = monthly_payments([Decimal('0.05')], [Decimal('0')], [2])
+        assert result == [Decimal('0.03')]
+
+    def test_exact_path_matches_fast_path(self):
+        """Test exact=True gives the same results"""
+        amounts = [Decimal('3000'), Decimal('10000')]
+        aprs = [Decimal('3.5'), Decimal('100')]
+        terms = [36, 12]
+        assert monthly_payments(amounts, aprs, terms, exact=True) == monthly_payments(amounts, aprs, terms)
+        assert monthly_payments_exact(amounts, aprs, terms) == monthly_payments(amounts, aprs, terms)
+
+    def test_empty_batch(self):
+        """Test an empty batch returns an empty list"""
+        assert monthly_payments([], [], []) == []
+
+    def test_mismatched_lengths(self):
+        """Test that columns of different lengths raise ValueError"""
+        with pytest.raises(ValueError, match="same length"):
+            monthly_payments([Decimal('1000')], [Decimal('5'), Decimal('6')], [12])
+
+    def test_invalid_row_raises(self):
+        """Test that an invalid scenario raises the scalar error message"""
+        with pytest.raises(ValueError, match="amount must be > 0"):
+            monthly_payments([Decimal('1000'), Decimal('0')], [Decimal('5'), Decimal('5')], [12, 12])
@@ -0,0 +1,33 @@
+import json
+import random
+
+from app import main as api
+from benchmarks.run import bench_api, compare, main
+
+
+def test_benchmark_run_writes_results(tmp_path):
+    output = tmp_path / "results.json"
+    assert main(["--calls", "5", "--repeat", "1", "--rows", "5", "--requests", "3", "--output", str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert report["meta"]["seed"] == 0
+    results = report["results"]
+    assert results["calc.monthly_payment"]["calls"] == 5
+    assert {"schedule.stepped_480", "schedule.export_360"} <= set(results)
+    assert results["api.get_loans_limit_100"]["rows"] == 5
+    assert results["api.post_loans"]["p50_ms"] <= results["api.post_loans"]["max_ms"]
+
+
+def test_post_loans_benchmark_saves_new_scenarios(monkeypatch):
+    duplicates = []
+    existing_loan_detail = api.existing_loan_detail
+    monkeypatch.setattr(api, "existing_loan_detail", lambda record: duplicates.append(record) or existing_loan_detail(record))
+    bench_api(random.Random(0), 5, 20)
+    assert duplicates == []
+
+
+def test_compare_reports_relative_change():
+    lines = compare({"a": {"best_per_sec": 150.0}}, {"a": {"best_per_sec": 100.0}, "b": {"p50_ms": 1.0}})
+    assert len(lines) == 1
+    assert "+50.0%" in lines[0]
+    # a zero baseline has no relative change
+    assert compare({"a": {"p50_ms": 1.0}}, {"a": {"p50_ms": 0.0}})[0].endswith("(n/a)")
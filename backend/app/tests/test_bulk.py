@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from app.bulk import chunked, detect_format, id_ranges, iter_csv_records, iter_json_records, iter_ndjson_records
+
+
+def test_detect_format():
+    assert detect_format("application/json; charset=utf-8") == "json"
+    assert detect_format("text/csv") == "csv"
+    assert detect_format("application/octet-stream", "rates.ndjson") == "ndjson"
+    assert detect_format(None, "rates.txt") is None
+
+
+def test_csv_records_report_malformed_rows():
+    lines = io.StringIO("amount,apr,term_months\n1000,5,12\n1000,5,12,extra\n")
+    records = list(iter_csv_records(lines))
+    assert records[0] == (1, {"amount": "1000", "apr": "5", "term_months": "12"})
+    assert records[1][0] == 2
+    assert isinstance(records[1][1], ValueError)
+
+
+def test_readers_stop_at_undecodable_stream():
+    # a strict stream cannot be read past a bad byte; earlier rows are kept
+    fp = io.TextIOWrapper(io.BytesIO(b"amount\n" + b"1\n" * 10000 + b"\xff\n"), encoding="utf-8", newline="")
+    records = list(iter_csv_records(fp))
+    assert all(isinstance(record, dict) for _, record in records[:-1])
+    row_number, error = records[-1]
+    assert row_number == len(records)
+    assert str(error).startswith("invalid UTF-8; this and later rows")
+
+
+def test_ndjson_records_skip_blank_lines():
+    records = list(iter_ndjson_records(['{"amount": 1}\n', "\n", "[1]\n"]))
+    assert records[0] == (1, {"amount": 1})
+    assert isinstance(records[1][1], ValueError)
+
+
+def test_json_records_require_array():
+    assert list(iter_json_records(io.StringIO('[{"amount": 1}]'))) == [(1, {"amount": 1})]
+    with pytest.raises(ValueError, match="JSON array"):
+        iter_json_records(io.StringIO('{"amount": 1}'))
+
+
+def test_chunked_and_id_ranges():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert id_ranges([5, 1, 2, 3, 7, 8]) == [[1, 3], [5, 5], [7, 8]]
@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+import pytest
+
+from app.cache import LRUCache, calc_key
+
+
+class TestLRUCache:
+    """Test suite for the bounded LRU cache"""
+
+    def test_hit_and_miss_counters(self):
+        """Test repeated keys are served from the cache"""
+        cache = LRUCache(capacity=2)
+        calls = []
+        compute = lambda: calls.append(1) or "value"
+        assert cache.get_or_compute("a", compute) == "value"
+        assert cache.get_or_compute("a", compute) == "value"
+        assert len(calls) == 1
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted first"""
+        cache = LRUCache(capacity=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get_or_compute("a", lambda: 0)  # touch "a"
+        cache.put("c", 3)
+        assert cache.get_or_compute("a", lambda: "recomputed") == 1
+        assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+        assert cache.stats()["evictions"] == 2
+
+    def test_disabled_cache_always_computes(self):
+        """Test a disabled cache stores nothing"""
+        cache = LRUCache(capacity=10, enabled=False)
+        cache.get_or_compute("a", lambda: 1)
+        assert cache.get_or_compute("a", lambda: 2) == 2
+        assert cache.stats()["size"] == 0
+        assert LRUCache(capacity=0).enabled is False
+
+    def test_invalidate_and_clear(self):
+        """Test entries can be dropped individually or all at once"""
+        cache = LRUCache(capacity=10)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.invalidate("a")
+        assert cache.stats()["size"] == 1
+        cache.clear()
+        assert cache.stats() == {"enabled": True, "capacity": 10, "size": 0, "hits": 0, "misses": 0, "evictions": 0}
+
+    def test_get_without_compute(self):
+        """Test get returns stored values and the default on a miss"""
+        cache = LRUCache(capacity=10)
+        assert cache.get("a") is None
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        assert LRUCache(capacity=0).get("a", "missing") == "missing"
+        assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+    def test_negative_capacity(self):
+        """Test that a negative capacity raises ValueError"""
+        with pytest.raises(ValueError, match="capacity must be >= 0"):
+            LRUCache(capacity=-1)
+
+    def test_calc_key_is_normalized(self):
+        """Test equal Decimals with different exponents share a key"""
+        assert calc_key(Decimal('250000.00'), Decimal('5.50'), 360) == calc_key(Decimal('250000'), Decimal('5.5'), 360)
+        assert hash(calc_key(Decimal('100'), Decimal('5'), 12)) == hash(calc_key(Decimal('100.0'), Decimal('5.000'), 12))
@@ -1,6 +1,7 @@
+import random
 import pytest
-from decimal import Decimal
-from app.calc import monthly_payment
+from decimal import Decimal, ROUND_HALF_UP
+from app.calc import amortization_cents, amortization_preview, implied_apr, max_principal, monthly_payment, payoff_term
 
 
 class TestMonthlyPayment:
@@ -236,3 +237,133 @@ class TestMonthlyPayment:
         )
         # Expected approximately $313/month
         assert Decimal('300') < result < Decimal('320')
+
+
+class TestInverseSolvers:
+    """Test suite for max_principal, payoff_term and implied_apr"""
+
+    def test_max_principal_round_trips(self):
+        """Test the solved amount is the largest whose payment fits the target"""
+        amount = max_principal(Decimal('1199.10'), Decimal('6'), 360)
+        assert monthly_payment(amount, Decimal('6'), 360) <= Decimal('1199.10')
+        assert monthly_payment(amount + Decimal('0.01'), Decimal('6'), 360) > Decimal('1199.10')
+        assert amount.as_tuple().exponent == -2
+
+    def test_max_principal_zero_apr(self):
+        """Test 0% APR uses payment times term"""
+        assert max_principal(Decimal('1000'), Decimal('0'), 12) >= Decimal('12000')
+
+    def test_payoff_term(self):
+        """Test the payoff term is the shortest term whose payment fits"""
+        assert payoff_term(Decimal('200000'), Decimal('6'), Decimal('1199.10')) == 360
+        assert payoff_term(Decimal('12000'), Decimal('0'), Decimal('1000')) == 12
+        n = payoff_term(Decimal('25000'), Decimal('4.5'), Decimal('500'))
+        assert monthly_payment(Decimal('25000'), Decimal('4.5'), n) <= Decimal('500')
+        assert monthly_payment(Decimal('25000'), Decimal('4.5'), n - 1) > Decimal('500')
+
+    def test_payoff_term_matches_linear_search(self):
+        """Test the bracketed search finds the same term as trying every term"""
+        for amount, apr, payment in [('25000', '4.5', '500'), ('1000', '0', '7'), ('999.99', '0', '0.01'), ('300000', '3', '1265.32'), ('5000', '12', '5100')]:
+            amount, apr, payment = Decimal(amount), Decimal(apr), Decimal(payment)
+            expected = next(n for n in range(1, 200000) if monthly_payment(amount, apr, n) <= payment)
+            assert payoff_term(amount, apr, payment) == expected
+
+    def test_payoff_term_large_amount_is_capped_quickly(self):
+        """Test a term far above the cap is rejected without walking every month"""
+        with pytest.raises(ValueError, match="within 480 months"):
+            payoff_term(Decimal('1e9'), Decimal('0'), Decimal('1'), max_term_months=480)
+        # uncapped, the answer is still found in logarithmic steps
+        n = payoff_term(Decimal('1e9'), Decimal('0'), Decimal('1'))
+        assert monthly_payment(Decimal('1e9'), Decimal('0'), n) == Decimal('1.00')
+        assert monthly_payment(Decimal('1e9'), Decimal('0'), n - 1) > Decimal('1')
+        # rounding lets exactly the capped term fit
+        assert payoff_term(Decimal('4800.02'), Decimal('0'), Decimal('10'), max_term_months=480) == 480
+
+    def test_payoff_term_payment_below_interest(self):
+        """Test that a payment not covering interest raises ValueError"""
+        with pytest.raises(ValueError, match="does not cover the monthly interest"):
+            payoff_term(Decimal('200000'), Decimal('6'), Decimal('1000'))
+
+    def test_implied_apr(self):
+        """Test the implied APR recovers the rate used to price the loan"""
+        assert implied_apr(Decimal('200000'), Decimal('1199.10'), 360) == Decimal('6.0000')
+        assert implied_apr(Decimal('12000'), Decimal('1000'), 12) == Decimal('0.0000')
+        payment = monthly_payment(Decimal('10000'), Decimal('100'), 12)
+        assert implied_apr(Decimal('10000'), payment, 12) == Decimal('100.0000')
+
+    def test_implied_apr_randomized(self):
+        """Test implied APR is consistent with monthly_payment across random loans"""
+        rng = random.Random(7)
+        for _ in range(200):
+            amount = Decimal(rng.randint(1000, 1000000))
+            apr = Decimal(rng.randint(1, 30000)) / Decimal(1000)
+            term = rng.randint(12, 480)
+            payment = monthly_payment(amount, apr, term)
+            solved = implied_apr(amount, payment, term)
+            # the payment is rounded to cents, so the recovered rate is close, not exact
+            assert abs(monthly_payment(amount, solved, term) - payment) <= Decimal('0.01')
+
+    def test_implied_apr_out_of_range(self):
+        """Test payments implying APRs outside 0-100% raise ValueError"""
+        with pytest.raises(ValueError, match="too small"):
+            implied_apr(Decimal('12000'), Decimal('900'), 12)
+        with pytest.raises(ValueError, match="above 100%"):
+            implied_apr(Decimal('12000'), Decimal('5000'), 12)
+
+
+def stepped_preview(amount, apr_percent, term_months, preview_months):
+    """Reference: the Decimal recurrence with quantize every step, in cents"""
+    M = monthly_payment(amount, apr_percent, term_months)
+    cent = Decimal('0.01')
+    balance = amount
+    rows = []
+    for _ in range(min(term_months, preview_months)):
+        if apr_percent == 0:
+            interest = Decimal('0.00')
+            principal = (amount / Decimal(term_months)).quantize(cent, rounding=ROUND_HALF_UP)
+        else:
+            interest = (balance * (apr_percent / Decimal('100') / Decimal('12'))).quantize(cent, rounding=ROUND_HALF_UP)
+            principal = (M - interest).quantize(cent, rounding=ROUND_HALF_UP)
+        balance = (balance - principal).quantize(cent, rounding=ROUND_HALF_UP)
+        rows.append((int(interest * 100), int(principal * 100), int(balance * 100)))
+    return rows
+
+
+class TestAmortizationCents:
+    """Test suite for the integer-cents schedule recurrence"""
+
+    def test_preview_strings(self):
+        """Test the preview keeps its string format"""
+        rows = amortization_preview(Decimal('250000'), Decimal('5.5'), 360, preview_months=2)
+        assert rows[0] == {
+            "month": 1,
+            "interest_paid": "1145.83",
+            "principal_paid": "273.64",
+            "remaining_balance": "249726.36",
+        }
+        assert rows[1]["month"] == 2
+
+    def test_zero_apr_preview(self):
+        """Test 0% APR rows have no interest and equal principal"""
+        rows = amortization_preview(Decimal('10000'), Decimal('0'), 3)
+        assert [r["interest_paid"] for r in rows] == ["0.00", "0.00", "0.00"]
+        assert [r["remaining_balance"] for r in rows] == ["6666.67", "3333.34", "0.01"]
+
+    def test_half_cent_ties(self):
+        """Test exact half-cent interest rounds up"""
+        # 1% a month on 0.50 is exactly half a cent
+        assert amortization_cents(Decimal('0.50'), Decimal('12'), 1)[0][0] == 1
+
+    def test_fractional_cent_amount_rejected(self):
+        """Test amounts with fractions of a cent raise ValueError"""
+        with pytest.raises(ValueError, match="whole cents"):
+            amortization_cents(Decimal('1000.005'), Decimal('7'), 24)
+
+    def test_randomized_matches_decimal(self):
+        """Test the integer recurrence equals the Decimal recurrence across random loans"""
+        rng = random.Random(14)
+        for _ in range(500):
+            amount = Decimal(rng.randint(1, 10 ** 10)) / Decimal(100)
+            apr = Decimal(rng.choice([0, rng.randint(1, 1000000)])) / Decimal(10000)
+            term = rng.randint(1, 480)
+            assert amortization_cents(amount, apr, term, 24) == stepped_preview(amount, apr, term, 24)
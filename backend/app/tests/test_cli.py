@@ -0,0 +1,102 @@
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+from app.calc import monthly_payment
+from app.cli import main, parse_scenario, run
+from app.executor import shutdown_pool
+from app.schedule import AmortizationSchedule
+
+CSV_INPUT = "amount,apr,term_months\n250000,5.5,360\n10000,0,12\nabc,5,12\n5000,5,12.5\n"
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text(CSV_INPUT)
+    return path
+
+
+def test_prices_csv_rows_and_reports_errors(csv_file):
+    out = io.StringIO()
+    assert run(str(csv_file), out, "csv", chunk_size=2) == (2, 2)
+    lines = out.getvalue().splitlines()
+    assert lines[0] == "row,amount,apr,term_months,monthly_payment,error"
+    assert lines[1] == f"1,250000,5.5,360,{monthly_payment(Decimal('250000'), Decimal('5.5'), 360)},"
+    assert lines[2] == "2,10000,0,12,833.33,"
+    assert lines[3] == "3,,,,,amount is not a number"
+    assert lines[4] == "4,,,,,term_months must be a whole number"
+
+
+def test_summary_columns(csv_file):
+    out = io.StringIO()
+    run(str(csv_file), out, "csv", summary=True)
+    header, first = out.getvalue().splitlines()[:2]
+    assert header.endswith("monthly_payment,total_interest,total_paid,error")
+    interest = AmortizationSchedule(Decimal("250000"), Decimal("5.5"), 360).total_interest()
+    assert first.endswith(f",{interest},{Decimal('250000.00') + interest},")
+
+
+def test_ndjson_in_and_out(tmp_path):
+    path = tmp_path / "rates.ndjson"
+    path.write_text('{"amount": 1000, "apr": 7.25, "term_months": 24}\n\n{"amount": 1000, "apr": 101, "term_months": 24}\n')
+    out = io.StringIO()
+    assert run(str(path), out, "ndjson", "ndjson") == (1, 1)
+    first, second = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert first["monthly_payment"] == float(monthly_payment(Decimal("1000"), Decimal("7.25"), 24))
+    assert second == {"row": 2, "error": "apr must be between 0 and 100"}
+
+
+def test_workers_keep_row_order(tmp_path):
+    path = tmp_path / "many.csv"
+    path.write_text("amount,apr,term_months\n" + "".join(f"{1000 + i},{i % 30}.5,{12 + i % 300}\n" for i in range(200)))
+    serial, parallel = io.StringIO(), io.StringIO()
+    run(str(path), serial, "csv", chunk_size=50)
+    try:
+        run(str(path), parallel, "csv", workers=2, chunk_size=50)
+    finally:
+        shutdown_pool()
+    assert parallel.getvalue() == serial.getvalue()
+
+
+def test_main_writes_output_file(csv_file, tmp_path, capsys):
+    output = tmp_path / "priced.ndjson"
+    assert main([str(csv_file), "-o", str(output), "--chunk-size", "3"]) == 0
+    assert len(output.read_text().splitlines()) == 4
+    assert "priced 2 rows, 2 failed" in capsys.readouterr().err
+
+
+def test_parse_scenario_checks():
+    assert parse_scenario({"amount": "100.50", "apr": 3.1, "term_months": "12"}) == (Decimal("100.50"), Decimal("3.1"), 12)
+    with pytest.raises(ValueError, match="missing apr"):
+        parse_scenario({"amount": "1", "term_months": "12"})
+    with pytest.raises(ValueError, match="finite"):
+        parse_scenario({"amount": "NaN", "apr": "1", "term_months": "12"})
+    with pytest.raises(ValueError, match="amount must be > 0"):
+        parse_scenario({"amount": "0", "apr": "1", "term_months": "12"})
+    with pytest.raises(ValueError, match="between 1 and 480"):
+        parse_scenario({"amount": "1000", "apr": "50", "term_months": "100000000"})
+
+
+def test_unpriceable_rows_are_reported_per_row(tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text("amount,apr,term_months\n250000,5.5,360\n1e30,5,360\n1000,50,100000000\n10000,0,3\n")
+    out = io.StringIO()
+    assert run(str(path), out, "csv", summary=True) == (2, 2)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 5
+    assert lines[2].endswith("values are too large to price")
+    assert "between 1 and 480" in lines[3]
+    assert lines[4].startswith("4,10000,0,3,3333.33,0.00,10000.00")
+
+
+def test_parquet_input(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "rates.parquet"
+    pq.write_table(pa.table({"amount": [250000.0], "apr": [5.5], "term_months": [360]}), path)
+    out = io.StringIO()
+    assert run(str(path), out, "parquet") == (1, 0)
+    assert ",1419.47," in out.getvalue()
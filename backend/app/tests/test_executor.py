@@ -0,0 +1,64 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from app.calc import monthly_payment
+from app.executor import map_ordered, price_scenarios, shutdown_pool
+
+
+@pytest.fixture
+def pool_cleanup():
+    yield
+    shutdown_pool()
+
+
+def random_scenarios(count, seed=42):
+    rng = random.Random(seed)
+    amounts = [Decimal(rng.randint(100, 100000000)) / Decimal(100) for _ in range(count)]
+    aprs = [Decimal(rng.randint(0, 30000)) / Decimal(1000) for _ in range(count)]
+    terms = [rng.randint(1, 480) for _ in range(count)]
+    return amounts, aprs, terms
+
+
+def test_process_pool_matches_serial_in_order(pool_cleanup):
+    amounts, aprs, terms = random_scenarios(1000)
+    expected = [monthly_payment(a, r, n) for a, r, n in zip(amounts, aprs, terms)]
+    result = price_scenarios(amounts, aprs, terms, workers=2, chunk_size=128)
+    assert [str(r) for r in result] == [str(e) for e in expected]
+
+
+def test_small_inputs_price_in_process():
+    amounts, aprs, terms = random_scenarios(10)
+    result = price_scenarios(amounts, aprs, terms, workers=4, chunk_size=100)
+    assert result == [monthly_payment(a, r, n) for a, r, n in zip(amounts, aprs, terms)]
+
+
+def test_worker_errors_propagate(pool_cleanup):
+    amounts, aprs, terms = random_scenarios(20)
+    amounts[15] = Decimal('0')
+    with pytest.raises(ValueError, match="amount must be > 0"):
+        price_scenarios(amounts, aprs, terms, workers=2, chunk_size=5)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError, match="chunk_size"):
+        price_scenarios([Decimal('1000')], [Decimal('5')], [12], chunk_size=0)
+    with pytest.raises(ValueError, match="same length"):
+        price_scenarios([Decimal('1000')], [], [12])
+
+
+def test_map_ordered_streams_in_order(pool_cleanup):
+    consumed = []
+
+    def items():
+        for i in range(20):
+            consumed.append(i)
+            yield i
+
+    results = map_ordered(abs, items(), workers=2, max_pending=3)
+    assert next(results) == 0
+    # only a bounded number of items is read ahead of the results taken
+    assert len(consumed) <= 3
+    assert list(results) == list(range(1, 20))
+    assert list(map_ordered(abs, [-1, -2], workers=0)) == [1, 2]
@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+import pytest
+
+from app.calc import monthly_payment
+from app.grid import decimal_range, iter_grid, range_count
+
+
+def test_grid_matches_monthly_payment():
+    aprs = decimal_range(Decimal('3'), Decimal('9'), Decimal('0.125'), 1000)
+    terms = [120, 180, 240, 360]
+    amounts = [Decimal(50000 * k) for k in range(1, 21)]
+    rows = list(iter_grid(aprs, terms, amounts))
+    assert len(rows) == len(aprs) * len(terms)
+    for apr, term, payments in rows:
+        assert payments == [monthly_payment(a, apr, term) for a in amounts]
+
+
+def test_grid_zero_apr():
+    (apr, term, payments), = iter_grid([Decimal('0')], [3], [Decimal('10000')])
+    assert payments == [Decimal('3333.33')]
+
+
+def test_decimal_range_is_inclusive_and_exact():
+    values = decimal_range(Decimal('3'), Decimal('9'), Decimal('0.125'), 1000)
+    assert len(values) == 49
+    assert values[1] == Decimal('3.125')
+    assert values[-1] == Decimal('9')
+    assert range_count(Decimal('3'), Decimal('9'), Decimal('0.125')) == len(values)
+    assert range_count(Decimal('1'), Decimal('10').scaleb(30), Decimal('1')) > 10 ** 30
+
+
+def test_decimal_range_errors():
+    with pytest.raises(ValueError, match="step"):
+        decimal_range(Decimal('1'), Decimal('2'), Decimal('0'), 10)
+    with pytest.raises(ValueError, match="stop"):
+        decimal_range(Decimal('2'), Decimal('1'), Decimal('1'), 10)
+    with pytest.raises(ValueError, match="more than"):
+        decimal_range(Decimal('0'), Decimal('100'), Decimal('1'), 10)
@@ -0,0 +1,80 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, create_engine
+
+from app import main
+from app.main import app
+from app.metrics import Histogram, instrument_engine, registry, stage_duration, timed
+
+
+@pytest.fixture
+def metrics_on():
+    registry.clear()
+    registry.enabled = True
+    yield
+    registry.enabled = False
+    registry.clear()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    instrument_engine(engine)
+    # the real session dependency, so its timing hook runs
+    monkeypatch.setattr(main, "engine", engine)
+    app.dependency_overrides.clear()
+    return TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "a")
+    histogram.observe(0.5, "a")
+    histogram.observe(5, "a")
+    lines = list(histogram.render())
+    assert lines[:2] == ["# HELP demo_seconds Demo.", "# TYPE demo_seconds histogram"]
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{stage="a"} 3' in lines
+    assert histogram.samples("a") == (3, 5.55)
+
+
+def test_histogram_rejects_wrong_labels():
+    with pytest.raises(ValueError, match="expects labels"):
+        Histogram("demo_seconds", "Demo.", ("stage",)).observe(1.0)
+
+
+def test_timed_is_noop_when_disabled():
+    registry.clear()
+    with timed("monthly_payment"):
+        pass
+    assert stage_duration.samples("monthly_payment") == (0, 0.0)
+
+
+def test_timed_records_stage(metrics_on):
+    with timed("monthly_payment"):
+        pass
+    assert stage_duration.samples("monthly_payment")[0] == 1
+
+
+def test_metrics_endpoint_404_when_disabled(client):
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_endpoint_reports_requests_and_stages(client, metrics_on):
+    assert client.post("/loans", json={"amount": 250000, "apr": 5.5, "term_months": 360}).status_code == 200
+    loan_id = client.get("/loans").json()[0]["id"]
+    assert client.get(f"/loans/{loan_id}").status_code == 200
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    body = resp.text
+    assert 'loan_api_request_duration_seconds_count{method="POST",route="/loans",status="200"} 1' in body
+    # route templates keep ids out of the labels
+    assert 'route="/loans/{loan_id}"' in body
+    for stage in ("monthly_payment", "schedule_preview", "db_session", "db_execute", "serialize"):
+        assert f'loan_api_stage_duration_seconds_count{{stage="{stage}"}}' in body
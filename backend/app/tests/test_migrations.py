@@ -0,0 +1,156 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine, select
+
+from app.main import SCHEMA_BACKFILLS, LoanScenario, scenario_hash
+from app.migrations import numeric_conversion_sql, upgrade
+from app.schedule import AmortizationSchedule
+
+
+def test_upgrade_adds_missing_columns_to_existing_table():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        # table as created by the first release
+        conn.execute(text(
+            "CREATE TABLE loanscenario (id INTEGER PRIMARY KEY, amount FLOAT NOT NULL, apr FLOAT NOT NULL, "
+            "term_months INTEGER NOT NULL, monthly_payment FLOAT NOT NULL, created_at DATETIME NOT NULL)"
+        ))
+        conn.execute(text(
+            "INSERT INTO loanscenario (amount, apr, term_months, monthly_payment, created_at) "
+            "VALUES (250000, 5.5, 360, 1419.47, '2024-01-01 00:00:00')"
+        ))
+    with engine.begin() as conn:
+        upgrade(conn, LoanScenario.__table__)
+    columns = {c["name"] for c in inspect(engine).get_columns("loanscenario")}
+    assert {c.name for c in LoanScenario.__table__.columns} <= columns
+    indexes = {i["name"] for i in inspect(engine).get_indexes("loanscenario")}
+    assert "ix_loanscenario_created_at_id" in indexes
+    # running it again is a no-op
+    with engine.begin() as conn:
+        upgrade(conn, LoanScenario.__table__)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT preview_json FROM loanscenario")).scalar() is None
+
+
+def test_float_rows_read_back_as_exact_decimals():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE loanscenario (id INTEGER PRIMARY KEY, amount FLOAT NOT NULL, apr FLOAT NOT NULL, "
+            "term_months INTEGER NOT NULL, monthly_payment FLOAT NOT NULL, created_at DATETIME NOT NULL)"
+        ))
+        # a float that drifted on its way in
+        conn.execute(text(
+            "INSERT INTO loanscenario (amount, apr, term_months, monthly_payment, created_at) "
+            "VALUES (0.1 + 0.2, 5.5, 12, 0.03, '2024-01-01 00:00:00')"
+        ))
+        upgrade(conn, LoanScenario.__table__)
+    with Session(engine) as session:
+        record = session.exec(select(LoanScenario)).one()
+    assert record.amount == Decimal("0.30")
+    assert record.apr == Decimal("5.5")
+
+
+def test_numeric_conversion_sql_for_postgres():
+    table = LoanScenario.__table__
+    sql = numeric_conversion_sql(table, table.c.amount, postgresql.dialect())
+    assert sql == "ALTER TABLE loanscenario ALTER COLUMN amount TYPE NUMERIC(16, 2) USING round(amount::numeric, 2)"
+    sql = numeric_conversion_sql(table, table.c.apr, postgresql.dialect())
+    assert sql.endswith("TYPE NUMERIC(9, 6) USING round(apr::numeric, 6)")
+
+
+def test_upgrade_backfills_content_hash_of_earliest_duplicate():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE loanscenario (id INTEGER PRIMARY KEY, amount FLOAT NOT NULL, apr FLOAT NOT NULL, "
+            "term_months INTEGER NOT NULL, monthly_payment FLOAT NOT NULL, created_at DATETIME NOT NULL)"
+        ))
+        for amount in (1000, 2000, 1000):
+            conn.execute(text(
+                "INSERT INTO loanscenario (amount, apr, term_months, monthly_payment, created_at) "
+                f"VALUES ({amount}, 5, 12, 85.61, '2024-01-01 00:00:00')"
+            ))
+    with engine.connect() as conn:
+        upgrade(conn, LoanScenario.__table__, SCHEMA_BACKFILLS)
+        conn.commit()
+    with engine.connect() as conn:
+        hashes = conn.execute(text("SELECT content_hash FROM loanscenario ORDER BY id")).scalars().all()
+    assert hashes[0] == scenario_hash(Decimal("1000"), Decimal("5"), 12)
+    assert hashes[1] == scenario_hash(Decimal("2000"), Decimal("5"), 12)
+    # the later duplicate stays, unhashed, so the unique index can be built
+    assert hashes[2] is None
+    indexes = {i["name"]: i for i in inspect(engine).get_indexes("loanscenario")}
+    assert indexes["ux_loanscenario_content_hash"]["unique"]
+    assert "backfill_loanscenario_content_hash" not in indexes
+
+
+def test_upgrade_backfills_total_interest(monkeypatch):
+    monkeypatch.setattr("app.main.BACKFILL_BATCH_SIZE", 2)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE loanscenario (id INTEGER PRIMARY KEY, amount FLOAT NOT NULL, apr FLOAT NOT NULL, "
+            "term_months INTEGER NOT NULL, monthly_payment FLOAT NOT NULL, created_at DATETIME NOT NULL)"
+        ))
+        for amount, term in ((1000, 12), (250000, 360), (1000, 12)):
+            conn.execute(text(
+                "INSERT INTO loanscenario (amount, apr, term_months, monthly_payment, created_at) "
+                f"VALUES ({amount}, 5, {term}, 0, '2024-01-01 00:00:00')"
+            ))
+    with engine.connect() as conn:
+        upgrade(conn, LoanScenario.__table__, SCHEMA_BACKFILLS)
+        conn.commit()
+    with Session(engine) as session:
+        interest = [record.total_interest for record in session.exec(select(LoanScenario).order_by(LoanScenario.id))]
+    small = AmortizationSchedule(Decimal("1000"), Decimal("5"), 12).total_interest()
+    assert interest == [small, AmortizationSchedule(Decimal("250000"), Decimal("5"), 360).total_interest(), small]
+    assert "backfill_loanscenario_total_interest" not in {i["name"] for i in inspect(engine).get_indexes("loanscenario")}
+
+
+def test_content_hash_backfill_runs_in_batches_and_resumes(monkeypatch):
+    monkeypatch.setattr("app.main.BACKFILL_BATCH_SIZE", 2)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE loanscenario (id INTEGER PRIMARY KEY, amount FLOAT NOT NULL, apr FLOAT NOT NULL, "
+            "term_months INTEGER NOT NULL, monthly_payment FLOAT NOT NULL, created_at DATETIME NOT NULL)"
+        ))
+        for amount in (1000, 2000, 3000, 2000, 1000, 4000, 3000):
+            conn.execute(text(
+                "INSERT INTO loanscenario (amount, apr, term_months, monthly_payment, created_at) "
+                f"VALUES ({amount}, 5, 12, 85.61, '2024-01-01 00:00:00')"
+            ))
+
+    calls = []
+
+    def interrupted_hash(*scenario):
+        # fail in the third batch, after two batches were committed
+        calls.append(scenario)
+        if len(calls) == 5:
+            raise KeyboardInterrupt
+        return scenario_hash(*scenario)
+
+    monkeypatch.setattr("app.main.scenario_hash", interrupted_hash)
+    with engine.connect() as conn:
+        with pytest.raises(KeyboardInterrupt):
+            upgrade(conn, LoanScenario.__table__, SCHEMA_BACKFILLS)
+    monkeypatch.setattr("app.main.scenario_hash", scenario_hash)
+    with engine.connect() as conn:
+        hashed = conn.execute(text("SELECT count(content_hash) FROM loanscenario")).scalar()
+    assert hashed == 3
+    # the column and the rows hashed so far were committed; the marker index says to run again
+    assert "backfill_loanscenario_content_hash" in {i["name"] for i in inspect(engine).get_indexes("loanscenario")}
+    with engine.connect() as conn:
+        upgrade(conn, LoanScenario.__table__, SCHEMA_BACKFILLS)
+        conn.commit()
+    with engine.connect() as conn:
+        hashes = conn.execute(text("SELECT content_hash FROM loanscenario ORDER BY id")).scalars().all()
+    # duplicates across batches are detected too
+    assert [h is not None for h in hashes] == [True, True, True, False, False, True, False]
+    assert hashes[5] == scenario_hash(Decimal("4000"), Decimal("5"), 12)
+    assert "backfill_loanscenario_content_hash" not in {i["name"] for i in inspect(engine).get_indexes("loanscenario")}
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+import pytest
+
+from app.calc import amortization_preview
+from app.prepayment import iter_prepayment_schedule, simulate_prepayment
+
+
+class TestPrepayment:
+    """Test suite for the prepayment simulation engine"""
+
+    def test_without_prepayment_matches_preview(self):
+        """Test the engine follows calc.amortization_preview rounding"""
+        rows = list(iter_prepayment_schedule(Decimal('250000'), Decimal('5.5'), 360))
+        preview = amortization_preview(Decimal('250000'), Decimal('5.5'), 360)
+        for row, expected in zip(rows, preview):
+            assert str(row.interest_paid) == expected["interest_paid"]
+            assert str(row.principal_paid) == expected["principal_paid"]
+            assert str(row.remaining_balance) == expected["remaining_balance"]
+        assert len(rows) == 360
+        assert rows[-1].remaining_balance == Decimal('0.00')
+
+    def test_recurring_extra_shortens_loan(self):
+        """Test extra principal every month pays the loan off early"""
+        summary = simulate_prepayment(Decimal('250000'), Decimal('5.5'), 360, extra_monthly=Decimal('200'))
+        assert summary.payoff_month < 360
+        assert summary.months_saved == 360 - summary.payoff_month
+        assert summary.interest_saved == summary.baseline_total_interest - summary.total_interest
+        assert summary.interest_saved > 0
+
+    def test_stops_when_balance_reaches_zero(self):
+        """Test a lump sum covering the balance ends the schedule that month"""
+        rows = list(iter_prepayment_schedule(Decimal('10000'), Decimal('5'), 60, lump_sums={6: Decimal('20000')}))
+        assert rows[-1].month == 6
+        assert rows[-1].remaining_balance == Decimal('0.00')
+        assert sum(r.principal_paid + r.extra_principal for r in rows) == Decimal('10000')
+
+    def test_recast_lowers_payment_and_keeps_term(self):
+        """Test recasting after a lump sum lowers the payment instead of the term"""
+        rows = list(iter_prepayment_schedule(
+            Decimal('250000'), Decimal('5.5'), 360, lump_sums={12: Decimal('50000')}, recast=True,
+        ))
+        assert rows[12].payment < rows[10].payment
+        assert rows[-1].month == 360
+        kept = list(iter_prepayment_schedule(Decimal('250000'), Decimal('5.5'), 360, lump_sums={12: Decimal('50000')}))
+        assert kept[-1].month < 360
+
+    def test_extra_start_month(self):
+        """Test recurring extra payments begin at extra_start_month"""
+        rows = list(iter_prepayment_schedule(
+            Decimal('100000'), Decimal('4'), 120, extra_monthly=Decimal('100'), extra_start_month=3,
+        ))
+        assert [r.extra_principal for r in rows[:3]] == [Decimal('0.00'), Decimal('0.00'), Decimal('100.00')]
+
+    def test_negative_extra_payment(self):
+        """Test that negative extra payments raise ValueError"""
+        with pytest.raises(ValueError, match="extra payments must be >= 0"):
+            list(iter_prepayment_schedule(Decimal('1000'), Decimal('5'), 12, extra_monthly=Decimal('-1')))
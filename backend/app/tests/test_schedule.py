@@ -0,0 +1,203 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from app import schedule as schedule_module
+from app.cache import checkpoint_cache
+from app.calc import monthly_payment, round_cents
+from app.prepayment import iter_prepayment_schedule
+from app.schedule import CSV_HEADER, AmortizationSchedule, ColumnarSchedule, compare_curves, format_cents, iter_schedule, stepped_columns
+
+
+class TestAmortizationSchedule:
+    """Test suite for the full-term schedule engine"""
+
+    def test_full_schedule_pays_off_exactly(self):
+        """Test a 30-year schedule ends at 0.00 and principal sums to the amount"""
+        rows = list(iter_schedule(Decimal('250000'), Decimal('5.5'), 360))
+        assert len(rows) == 360
+        assert rows[-1].remaining_balance == Decimal('0.00')
+        assert sum(r.principal_paid for r in rows) == Decimal('250000')
+
+    def test_payment_is_constant_until_payoff(self):
+        """Test every row but the last pays exactly the monthly payment"""
+        M = monthly_payment(Decimal('200000'), Decimal('6'), 360)
+        rows = list(iter_schedule(Decimal('200000'), Decimal('6'), 360))
+        assert all(r.interest_paid + r.principal_paid == M for r in rows[:-1])
+
+    def test_window_matches_full_schedule(self):
+        """Test a slice of months equals the same rows of the full schedule"""
+        full = list(iter_schedule(Decimal('300000'), Decimal('3.5'), 480))
+        window = list(iter_schedule(Decimal('300000'), Decimal('3.5'), 480, start=240, end=252))
+        assert window == full[239:252]
+
+    def test_every_window_matches_full_schedule(self):
+        """Test windows stepped from a checkpoint equal the full schedule, including after payoff"""
+        for amount, apr, term in [('300000', '3.5', 480), ('968434.64', '26.274', 12), ('10000', '0', 30), ('12345.678', '7.25', 61)]:
+            schedule = AmortizationSchedule(Decimal(amount), Decimal(apr), term)
+            full = stepped_columns(Decimal(amount), Decimal(apr), term, term)
+            for start in range(1, term + 1, 7):
+                end = min(term, start + 13)
+                window = schedule.window(start, end)
+                assert window.start_month == start
+                assert list(window.balance) == list(full.balance[start - 1:end])
+                assert list(window.interest) == list(full.interest[start - 1:end])
+            for month in range(term + 1):
+                expected = Decimal(full.balance[month - 1]).scaleb(-2) if month else round_cents(Decimal(amount))
+                assert schedule.balance_at(month) == expected
+
+    def test_window_steps_from_cached_checkpoint(self, monkeypatch):
+        """Test a late window steps only from the nearest checkpoint once the loan is cached"""
+        checkpoint_cache.clear()
+        AmortizationSchedule(Decimal('300000'), Decimal('3.5'), 480).total_interest()
+        stepped = []
+        real = schedule_module.step_columns
+
+        def counting(balance, apr, term, start_month, months, payment):
+            stepped.append(months)
+            return real(balance, apr, term, start_month, months, payment)
+
+        monkeypatch.setattr(schedule_module, "step_columns", counting)
+        window = AmortizationSchedule(Decimal('300000.0'), Decimal('3.50'), 480).window(300, 305)
+        assert len(window) == 6
+        assert stepped == [(305 - 289 + 1)]
+        assert checkpoint_cache.stats()["hits"] >= 1
+
+    def test_balance_at_matches_rows(self):
+        """Test jumping to a month gives the same balance as iterating"""
+        rows = list(iter_schedule(Decimal('150000'), Decimal('4.25'), 180))
+        schedule = AmortizationSchedule(Decimal('150000'), Decimal('4.25'), 180)
+        assert schedule.balance_at(100) == rows[99].remaining_balance
+        assert schedule.balance_at(0) == Decimal('150000.00')
+
+    def test_matches_prepayment_baseline(self):
+        """Test every row and the lifetime interest equal the prepayment engine without extras"""
+        for amount, apr, term in [('959864', '14.08', 480), ('250000', '5.5', 360), ('200001', '6', 360), ('12000', '0', 6), ('12345.678', '7.25', 60)]:
+            schedule = AmortizationSchedule(Decimal(amount), Decimal(apr), term)
+            baseline = list(iter_prepayment_schedule(Decimal(amount), Decimal(apr), term))
+            rows = list(schedule.rows())
+            assert [r.remaining_balance for r in rows] == [b.remaining_balance for b in baseline]
+            assert [r.interest_paid for r in rows] == [b.interest_paid for b in baseline]
+            assert schedule.total_interest() == sum(b.interest_paid for b in baseline)
+        assert AmortizationSchedule(Decimal('959864'), Decimal('14.08'), 480).total_interest() == Decimal('4466127.05')
+
+    def test_preview_is_first_months(self):
+        """Test the 12-month preview columns equal the start of the full schedule"""
+        schedule = AmortizationSchedule(Decimal('959864'), Decimal('14.08'), 480)
+        assert stepped_columns(Decimal('959864'), Decimal('14.08'), 480, 12) == schedule.window(1, 12)
+        short = AmortizationSchedule(Decimal('968434.64'), Decimal('26.274'), 12)
+        assert stepped_columns(Decimal('968434.64'), Decimal('26.274'), 12, 12) == short.window()
+        assert short.balance_at(11) > 0 and short.window(12, 12).balance[0] == 0
+
+    def test_zero_apr_final_row_absorbs_rounding(self):
+        """Test the last 0% APR row settles the remaining cents"""
+        rows = list(iter_schedule(Decimal('10000'), Decimal('0'), 3))
+        assert [r.principal_paid for r in rows] == [Decimal('3333.33'), Decimal('3333.33'), Decimal('3333.34')]
+
+    def test_high_rate_long_term_precision(self):
+        """Test the schedule still pays off exactly at 100% APR over 480 months"""
+        rows = list(AmortizationSchedule(Decimal('1000000'), Decimal('100'), 480).rows())
+        assert rows[-1].remaining_balance == Decimal('0.00')
+        assert sum(r.principal_paid for r in rows) == Decimal('1000000')
+
+    def test_total_interest_matches_rows(self):
+        """Test lifetime interest equals the sum over all rows"""
+        for amount, apr, term in [('250000', '5.5', 360), ('12000', '0', 7), ('1000000', '100', 480), ('0.05', '3', 12)]:
+            schedule = AmortizationSchedule(Decimal(amount), Decimal(apr), term)
+            assert schedule.total_interest() == sum(r.interest_paid for r in schedule.rows())
+
+    def test_invalid_window(self):
+        """Test windows outside the term raise ValueError"""
+        with pytest.raises(ValueError, match="window"):
+            iter_schedule(Decimal('10000'), Decimal('5'), 12, start=0)
+        with pytest.raises(ValueError, match="window"):
+            iter_schedule(Decimal('10000'), Decimal('5'), 12, start=5, end=13)
+
+
+class TestCompareCurves:
+    def test_given_payment_gives_same_rows(self):
+        """Test schedules built from a precomputed payment match independent ones"""
+        apr = Decimal('6.5')
+        for amount in (Decimal('1000'), Decimal('250000'), Decimal('77777.77')):
+            shared = AmortizationSchedule(amount, apr, 120, payment=monthly_payment(amount, apr, 120))
+            assert list(shared.rows()) == list(iter_schedule(amount, apr, 120))
+
+    def test_curves_follow_schedule(self):
+        """Test curves match the schedule rows and are padded after payoff"""
+        amount, apr = Decimal('20000'), Decimal('4.75')
+        curves = compare_curves([(amount, apr, 24)], 30)[0]
+        rows = list(iter_schedule(amount, apr, 24))
+        assert curves.monthly_payment == monthly_payment(amount, apr, 24)
+        assert curves.balance[:24] == [r.remaining_balance for r in rows]
+        assert curves.payment[:24] == [r.interest_paid + r.principal_paid for r in rows]
+        total = sum(r.interest_paid for r in rows)
+        assert curves.cumulative_interest[23] == total
+        assert curves.cumulative_interest[24:] == [total] * 6
+        assert curves.payment[24:] == curves.balance[24:] == [Decimal('0.00')] * 6
+
+    def test_truncated_and_repeated(self):
+        """Test curves can stop before the term and repeated scenarios share results"""
+        scenarios = [(Decimal('5000'), Decimal('0'), 10), (Decimal('5000'), Decimal('0'), 10)]
+        first, second = compare_curves(scenarios, 3)
+        assert first is second
+        assert first.balance == [Decimal('4500'), Decimal('4000'), Decimal('3500')]
+
+
+class TestColumnarSchedule:
+    """Test suite for the columnar cent-array schedule"""
+
+    def test_window_rows(self):
+        """Test a window's cent columns come back as the schedule rows"""
+        rows = list(iter_schedule(Decimal('250000'), Decimal('5.5'), 360, start=13, end=24))
+        columns = AmortizationSchedule(Decimal('250000'), Decimal('5.5'), 360).window(13, 24)
+        assert len(columns) == 12
+        assert list(columns.rows()) == rows
+
+    def test_json_matches_rows(self):
+        """Test the hand-written JSON parses to the same items as the rows"""
+        columns = AmortizationSchedule(Decimal('12345.67'), Decimal('7.25'), 60).window()
+        items = json.loads(columns.to_json(), parse_float=Decimal)
+        assert items == [
+            {
+                "month": r.month,
+                "interest_paid": r.interest_paid,
+                "principal_paid": r.principal_paid,
+                "remaining_balance": r.remaining_balance,
+            }
+            for r in columns.rows()
+        ]
+        assert items[0]["month"] == 1
+
+    def test_storage_round_trip(self):
+        """Test the storage format restores an equal schedule"""
+        columns = ColumnarSchedule(5, [100, 99], [200, 201], [700, 499])
+        restored = ColumnarSchedule.from_storage(columns.to_storage())
+        assert restored == columns
+        assert restored.start_month == 5
+
+    def test_csv(self):
+        """Test CSV output has the shared header and one line per row"""
+        columns = ColumnarSchedule(1, [5], [1000], [0])
+        assert "".join(columns.iter_csv()) == CSV_HEADER + "1,0.05,10.00,0.00\n"
+
+    def test_ndjson_chunks(self):
+        """Test NDJSON lines match the JSON items and are batched"""
+        columns = AmortizationSchedule(Decimal('250000'), Decimal('5.5'), 360).window(1, 250)
+        chunks = list(columns.iter_ndjson(rows_per_chunk=100))
+        assert len(chunks) == 3
+        items = [json.loads(line) for line in "".join(chunks).splitlines()]
+        assert items == json.loads(columns.to_json())
+
+    def test_format_cents(self):
+        """Test cents are formatted with two decimals and a sign"""
+        assert format_cents(0) == "0.00"
+        assert format_cents(7) == "0.07"
+        assert format_cents(123456) == "1234.56"
+        assert format_cents(-5) == "-0.05"
+
+    def test_empty_and_mismatched(self):
+        """Test an empty schedule serializes and mismatched columns are rejected"""
+        assert ColumnarSchedule().to_json() == "[]"
+        with pytest.raises(ValueError, match="same length"):
+            ColumnarSchedule(1, [1, 2], [1], [1])
@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+import pytest
+
+from app.arm import ArmEngine, ArmTerms
+from app.calc import monthly_payment
+from app import stress
+from app.executor import shutdown_pool
+from app.stress import MAX_SEED, StressModel, evaluate_loan, generate_paths, new_seed, reset_steps, run_stress
+
+np = pytest.importorskip("numpy")
+
+LOANS = [
+    (1, Decimal('250000'), Decimal('5.5'), 360),
+    (2, Decimal('30000'), Decimal('7'), 60),
+    (3, Decimal('12000'), Decimal('0'), 24),
+]
+
+
+class TestStress:
+    """Test suite for the Monte Carlo rate stress engine"""
+
+    def test_paths_are_reproducible_in_blocks(self, monkeypatch):
+        """Test a seed gives the same paths, and longer runs extend them"""
+        model = StressModel(paths=25, seed=42, volatility=1.5, mean_reversion=0.2)
+        paths = generate_paths(model, 10)
+        assert paths.shape == (25, 10)
+        assert np.array_equal(paths, generate_paths(model, 10))
+        assert not np.array_equal(paths, generate_paths(model._replace(seed=43), 10))
+        # longer paths extend shorter ones
+        assert np.array_equal(generate_paths(model, 4), paths[:, :4])
+        monkeypatch.setattr("app.stress.STRESS_BLOCK_PATHS", 10)
+        blocked = generate_paths(model, 10)
+        assert blocked.shape == (25, 10)
+        assert np.isfinite(blocked).all()
+
+    def test_matches_arm_engine(self):
+        """Test the vectorized closed form agrees with the month-by-month ARM engine to the cent"""
+        model = StressModel(paths=4, seed=7, volatility=2.0)
+        shifts = generate_paths(model, reset_steps(360, model))
+        initial, max_payment, interest = evaluate_loan(300000.0, 6.0, 360, model, shifts)
+        engine = ArmEngine(Decimal('300000'), 360, ArmTerms(Decimal('6'), 12, Decimal('0')))
+        for i in range(4):
+            result = engine.run([Decimal(repr(6 + float(v))) for v in shifts[i]])
+            assert float(result.total_interest) == pytest.approx(interest[i], abs=1.0)
+            assert float(result.max_payment) == pytest.approx(max_payment[i], abs=0.01)
+        assert initial == pytest.approx(float(monthly_payment(Decimal('300000'), Decimal('6'), 360)), abs=0.005)
+
+    def test_zero_volatility_is_fixed_rate(self):
+        """Test paths without randomness leave every loan at its fixed-rate payment"""
+        result = run_stress(LOANS, StressModel(paths=50, seed=1, volatility=0.0), [5, 50, 95])
+        for loan, (_, amount, apr, term) in zip(result.loans, LOANS):
+            payment = float(monthly_payment(amount, apr, term))
+            assert loan.monthly_payment == pytest.approx(payment, abs=0.01)
+            assert loan.payment_shock == [0.0, 0.0, 0.0]
+            assert loan.total_interest[0] == loan.total_interest[2]
+        assert result.loans[2].total_interest == [0.0, 0.0, 0.0]
+
+    def test_percentiles_ordered_and_independent_of_other_loans(self):
+        """Test percentiles are monotone and a loan's results do not depend on the rest of the run"""
+        model = StressModel(paths=2000, seed=3, volatility=1.0, lifetime_cap=5.0)
+        result = run_stress(LOANS, model)
+        assert run_stress(LOANS[1:2], model).loans == result.loans[1:2]
+        for loan in result.loans:
+            assert loan.total_interest == sorted(loan.total_interest)
+            assert loan.payment_shock[0] >= 0
+        assert result.portfolio_total_interest == sorted(result.portfolio_total_interest)
+        # a 5 point cap bounds the highest rate the first loan can reach
+        capped = monthly_payment(Decimal('250000'), Decimal('10.5'), 348)
+        assert result.loans[0].max_payment[-1] <= float(capped)
+
+    def test_path_blocks_split_across_workers(self, monkeypatch):
+        """Test blocks of paths evaluated in pool workers give the in-process result"""
+        monkeypatch.setattr("app.stress.STRESS_BLOCK_PATHS", 100)
+        model = StressModel(paths=250, seed=5, volatility=1.0)
+        assert stress.path_blocks(model) == [(0, 100), (100, 200), (200, 250)]
+        result = run_stress(LOANS, model, workers=0)
+        try:
+            assert run_stress(LOANS, model, workers=2) == result
+        finally:
+            shutdown_pool()
+
+    def test_new_seed_fits_json_numbers(self):
+        """Test generated seeds are integers a double represents exactly"""
+        seeds = [new_seed() for _ in range(100)]
+        assert all(isinstance(s, int) and 0 <= s <= MAX_SEED for s in seeds)
+        assert len(set(seeds)) == 100
+
+    def test_limits(self, monkeypatch):
+        """Test empty inputs and oversized runs are rejected"""
+        with pytest.raises(ValueError, match="no loans"):
+            run_stress([], StressModel(paths=10, seed=1))
+        monkeypatch.setattr("app.stress.STRESS_MAX_CELLS", 100)
+        with pytest.raises(ValueError, match="rate values"):
+            run_stress(LOANS, StressModel(paths=10, seed=1))
+        with pytest.raises(ValueError, match="per-path results"):
+            run_stress(LOANS, StressModel(paths=40, seed=1, fixed_months=360))
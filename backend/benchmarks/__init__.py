@@ -0,0 +1,6 @@
+"""
+Reproducible benchmarks for the calculation engine and the API.
+
+Run from the backend directory with ``python -m benchmarks.run``; see
+``python -m benchmarks.run --help`` for options.
+"""
@@ -0,0 +1,224 @@
+"""
+Benchmark suite: calc throughput, schedule generation and endpoint latency.
+
+Inputs come from a seeded RNG, so two runs with the same options price the
+same scenarios. Results are written as JSON (see --output); pass --compare
+with an earlier results file to print the relative change of every metric.
+
+    python -m benchmarks.run --output before.json
+    git checkout other-branch
+    python -m benchmarks.run --output after.json --compare before.json
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session, create_engine
+
+from app.cache import payment_cache, preview_cache
+from app.calc import amortization_preview, monthly_payment
+from app.main import LoanCreate, app, get_session, new_loan_record
+from app.schedule import iter_schedule
+
+TERMS = (12, 24, 36, 60, 72, 120, 180, 240, 360, 480)
+SCHEDULE_MONTHS = (12, 360, 480)
+
+
+def scenarios(rng: random.Random, count: int) -> List[tuple]:
+    """
+    Random (amount, apr, term_months) triples: amounts to the cent up to 1M,
+    APRs with three decimals up to 30% (one in twenty at 0%) and common terms.
+    """
+    result = []
+    for _ in range(count):
+        amount = Decimal(rng.randint(100000, 100000000)) / Decimal(100)
+        apr = Decimal(0) if rng.random() < 0.05 else Decimal(rng.randint(1, 30000)) / Decimal(1000)
+        result.append((amount, apr, rng.choice(TERMS)))
+    return result
+
+
+def throughput(fn: Callable, inputs: Sequence[tuple], repeat: int) -> Dict[str, float]:
+    """
+    Calls per second over `inputs`, best and median of `repeat` passes.
+    """
+    rates = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for args in inputs:
+            fn(*args)
+        rates.append(len(inputs) / (time.perf_counter() - start))
+    return {"calls": len(inputs), "best_per_sec": max(rates), "median_per_sec": statistics.median(rates)}
+
+
+def latency(send: Callable[[int], object], count: int, warmup: int = 10) -> Dict[str, float]:
+    """
+    Request latency percentiles in milliseconds; send(i) issues request i.
+    Warmup requests are 0..warmup-1 and timed ones follow, so no timed request
+    repeats a warmup one.
+    """
+    for i in range(warmup):
+        send(i)
+    samples = []
+    for i in range(warmup, warmup + count):
+        start = time.perf_counter()
+        send(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+
+    def percentile(p: float) -> float:
+        return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))]
+
+    return {
+        "requests": count,
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": percentile(50),
+        "p90_ms": percentile(90),
+        "p99_ms": percentile(99),
+        "max_ms": samples[-1],
+    }
+
+
+def bench_calc(rng: random.Random, calls: int, repeat: int) -> Dict[str, dict]:
+    inputs = scenarios(rng, calls)
+    return {
+        "calc.monthly_payment": throughput(monthly_payment, inputs, repeat),
+        "calc.amortization_preview": throughput(amortization_preview, inputs, repeat),
+    }
+
+
+def bench_schedules(rng: random.Random, calls: int, repeat: int) -> Dict[str, dict]:
+    results = {}
+    for months in SCHEDULE_MONTHS:
+        # every scenario needs a term of at least `months`
+        inputs = [(a, r, max(t, months)) for a, r, t in scenarios(rng, calls)]
+        results[f"schedule.stepped_{months}"] = throughput(
+            lambda a, r, t: amortization_preview(a, r, t, preview_months=months), inputs, repeat
+        )
+        results[f"schedule.export_{months}"] = throughput(
+            lambda a, r, t: sum(1 for _ in iter_schedule(a, r, t, end=months)), inputs, repeat
+        )
+    return results
+
+
+def bench_api(rng: random.Random, rows: int, requests: int) -> Dict[str, dict]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(engine)
+
+        def get_bench_session():
+            with Session(engine) as session:
+                yield session
+
+        with Session(engine) as session:
+            for amount, apr, term in scenarios(rng, rows):
+                session.add(new_loan_record(LoanCreate(amount=amount, apr=apr, term_months=term))[0])
+            session.commit()
+
+        def payloads():
+            return [
+                {"amount": str(amount), "apr": str(apr), "term_months": term}
+                for amount, apr, term in scenarios(rng, requests + 10)
+            ]
+
+        # separate scenarios per endpoint: POST /loans must neither hit the
+        # calculation caches warmed by /loans/calculate nor save a duplicate
+        calculate_payloads, create_payloads = payloads(), payloads()
+        app.dependency_overrides[get_session] = get_bench_session
+        try:
+            client = TestClient(app)
+            results = {
+                "api.post_calculate": latency(lambda i: client.post("/loans/calculate", json=calculate_payloads[i]), requests),
+                "api.post_loans": latency(lambda i: client.post("/loans", json=create_payloads[i]), requests),
+                "api.get_loans_limit_100": latency(lambda i: client.get("/loans", params={"limit": 100}), requests),
+                "api.get_loans_limit_1000": latency(lambda i: client.get("/loans", params={"limit": 1000}), requests),
+            }
+        finally:
+            app.dependency_overrides.pop(get_session, None)
+            engine.dispose()
+    for result in results.values():
+        result["rows"] = rows
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict]) -> List[str]:
+    """
+    One line per shared metric with its relative change; for latencies lower
+    is better, for throughputs higher is better.
+    """
+    lines = []
+    for name, metrics in current.items():
+        for key in ("best_per_sec", "p50_ms", "p99_ms"):
+            if key in metrics and key in baseline.get(name, {}):
+                old, new = baseline[name][key], metrics[key]
+                change = f"{(new - old) / old:+.1%}" if old else "n/a"
+                lines.append(f"{name:32} {key:14} {old:12.3f} -> {new:12.3f}  ({change})")
+    return lines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="benchmark-results.json", help="results file (default: %(default)s)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--calls", type=int, default=2000, help="calls per throughput pass")
+    parser.add_argument("--repeat", type=int, default=5, help="passes per throughput benchmark")
+    parser.add_argument("--rows", type=int, default=10000, help="saved loans before the API benchmarks")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument("--quick", action="store_true", help="small sizes for a smoke run")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.calls, args.repeat, args.rows, args.requests = 200, 2, 500, 30
+
+    # start cold so runs do not depend on what ran before in the process
+    payment_cache.clear()
+    preview_cache.clear()
+    rng = random.Random(args.seed)
+    results: Dict[str, dict] = {}
+    results.update(bench_calc(rng, args.calls, args.repeat))
+    results.update(bench_schedules(rng, max(1, args.calls // 10), args.repeat))
+    results.update(bench_api(rng, args.rows, args.requests))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "calls": args.calls,
+            "repeat": args.repeat,
+            "rows": args.rows,
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    print(f"wrote {args.output}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["results"]
+        print("\n".join(compare(results, baseline)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())